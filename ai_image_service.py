@@ -3,13 +3,16 @@ AI Image generation service for e-paper display
 Generates pixel art images using OpenAI DALL-E API
 """
 
+import io
 import os
 import logging
 import hashlib
+import functools
 import requests
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from datetime import datetime, date
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 #from PIL import Image, ImageOps
 
 # Compatibilidade PILLOW
@@ -32,9 +35,60 @@ except AttributeError:
 
 logger = logging.getLogger(__name__)
 
+# Menor tamanho suportado por cada modelo (a imagem é reduzida para ~96x110)
+DALLE_SIZES = {
+    "dall-e-2": "256x256",
+    "dall-e-3": "1024x1024",
+}
+
+def _read_uncached(path: Path) -> bytes:
+    """Read a small file and ask the kernel to drop it from the page cache"""
+    fd = os.open(str(path), os.O_RDONLY)
+    try:
+        data = os.read(fd, os.fstat(fd).st_size)
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        return data
+    finally:
+        os.close(fd)
+
+def _write_uncached(path: Path, data: bytes):
+    """Write a small file and ask the kernel to drop it from the page cache"""
+    fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, data)
+        if hasattr(os, 'posix_fadvise'):
+            # Páginas sujas não são descartadas; sincroniza antes do aviso
+            os.fdatasync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+@functools.lru_cache(maxsize=4)
+def _prompt_for_day(day_ord: int, themes: tuple) -> str:
+    """Build the prompt for a given day ordinal and theme list (pure, cached per day)"""
+    day_of_year = date.fromordinal(day_ord).timetuple().tm_yday
+
+    # Seleciona tema baseado no dia do ano para consistência diária
+    theme = themes[day_of_year % len(themes)]
+    return f"8-bit {theme}, muito simples, minimalista, fundo branco limpo"
+
+def dither_to_1bit(gray: Image.Image) -> Image.Image:
+    """
+    Floyd-Steinberg dither of an 'L' image to 1-bit
+
+    Uses Pillow's native error-diffusion; the resulting '1' image's
+    tobytes() is already bit-packed (8 pixels/byte, MSB first).
+    """
+    if gray.mode != 'L':
+        gray = gray.convert('L')
+    return gray.convert('1', dither=Image.Dither.FLOYDSTEINBERG)
+
 class AIImageService:
     """Handles AI image generation for e-paper display"""
 
+    FALLBACK_THEMES = ("uma imagem pixel art simples em preto e branco",)
+
     def __init__(self, config):
         self.config = config
         self.cache_dir = config.BASE_DIR / 'image_cache'
@@ -45,25 +99,39 @@ class AIImageService:
         if not self.api_key:
             logger.warning("OPENAI_API_KEY não encontrada. Imagens AI desabilitadas.")
 
-    def _get_cache_path(self, prompt_hash: str) -> Path:
-        """Get cache file path for a prompt hash"""
-        return self.cache_dir / f"ai_image_{prompt_hash}.png"
+        # Sessão HTTP reutilizada (mantém TCP/TLS entre chamada à API e download)
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+        self._session.mount("https://", adapter)
+        if self.api_key:
+            self._session.headers["Authorization"] = f"Bearer {self.api_key}"
 
-    def _generate_daily_prompt(self) -> str:
-        """Generate a daily prompt for pixel art"""
-        day_of_year = datetime.now().timetuple().tm_yday
+        # Tela 'L' reutilizada entre processamentos
+        self._canvas = None
 
-        # Get themes from config
-        themes = self.config.AI_IMAGE_THEMES
+        # Imagem do dia já processada (evita reabrir o PNG a cada atualização)
+        self._today_img = None
+        self._today_key = None
 
-        if not themes:
-            # Fallback if no themes configured
-            themes = ["uma imagem pixel art simples em preto e branco"]
+        # (prompt, hash, caminho do cache) do dia, recalculado só quando dia/tamanho mudam
+        self._entry_key = None
+        self._entry = None
 
-        # Seleciona tema baseado no dia do ano para consistência diária
-        theme = themes[day_of_year % len(themes)]
+    def _get_cache_path(self, prompt_hash: str, size: tuple) -> Path:
+        """Get cache file path for a 16-char BLAKE2b prompt hash and image size (raw 1-bit bytes)"""
+        return self.cache_dir / f"ai_image_{prompt_hash}_{size[0]}x{size[1]}.bin"
 
-        return f"8-bit {theme}, muito simples, minimalista, fundo branco limpo"
+    def _cache_entry_for_day(self, day_ord: int, size: tuple) -> Tuple[str, str, Path]:
+        """Return (prompt, prompt_hash, cache_path) for a given day ordinal and size"""
+        key = (day_ord, size)
+        if self._entry_key != key:
+            # Fallback if no themes configured
+            themes = self.config.AI_IMAGE_THEMES or self.FALLBACK_THEMES
+            prompt = _prompt_for_day(day_ord, themes)
+            prompt_hash = hashlib.blake2b(prompt.encode('utf-8'), digest_size=8).hexdigest()
+            self._entry = (prompt, prompt_hash, self._get_cache_path(prompt_hash, size))
+            self._entry_key = key
+        return self._entry
 
     def _call_dalle_api(self, prompt: str) -> Optional[bytes]:
         """Call OpenAI DALL-E API to generate image"""
@@ -71,23 +139,19 @@ class AIImageService:
             return None
 
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-
+            model = self.config.AI_IMAGE_MODEL
             data = {
-                "model": "dall-e-3",
+                "model": model,
                 "prompt": prompt,
-                "size": "1024x1024",  # Geramos grande e reduzimos
-                "quality": "standard",
+                "size": DALLE_SIZES.get(model, "1024x1024"),
                 "n": 1
             }
+            if model == "dall-e-3":
+                data["quality"] = "standard"
 
             logger.info("Gerando imagem AI via DALL-E...")
-            response = requests.post(
+            response = self._session.post(
                 "https://api.openai.com/v1/images/generations",
-                headers=headers,
                 json=data,
                 timeout=60
             )
@@ -96,11 +160,15 @@ class AIImageService:
                 result = response.json()
                 image_url = result['data'][0]['url']
 
-                # Download da imagem
-                img_response = requests.get(image_url, timeout=30)
-                if img_response.status_code == 200:
-                    logger.info("Imagem AI gerada com sucesso")
-                    return img_response.content
+                # Download da imagem em blocos (sem enviar a chave da OpenAI ao CDN)
+                with self._session.get(image_url, timeout=30, stream=True,
+                                       headers={"Authorization": None}) as img_response:
+                    if img_response.status_code == 200:
+                        buf = io.BytesIO()
+                        for chunk in img_response.iter_content(chunk_size=64 * 1024):
+                            buf.write(chunk)
+                        logger.info("Imagem AI gerada com sucesso")
+                        return buf.getvalue()
 
             else:
                 logger.error(f"Erro na API DALL-E: {response.status_code} - {response.text}")
@@ -113,28 +181,30 @@ class AIImageService:
     def _process_image_for_epaper(self, image_bytes: bytes, target_size: tuple) -> Optional[Image.Image]:
         """Process image for e-paper display (black & white, target size)"""
         try:
-            import io
-            # Carrega imagem
+            # Carrega e converte para escala de cinza numa única passagem
             img = Image.open(io.BytesIO(image_bytes))
-
-            # Converte para escala de cinza
-            img = img.convert('L')
-
-            # Redimensiona mantendo aspecto, depois corta/preenche para tamanho exato
-            img.thumbnail(target_size, Image.Resampling.LANCZOS)
-
-            # Cria imagem final com fundo branco
-            final_img = Image.new('L', target_size, 255)
-
-            # Centraliza a imagem redimensionada
-            paste_x = (target_size[0] - img.width) // 2
-            paste_y = (target_size[1] - img.height) // 2
+            if img.mode != 'L':
+                img = img.convert('L')
+
+            # Tamanho final preservando aspecto, calculado uma vez (um único resize)
+            scale = min(target_size[0] / img.width, target_size[1] / img.height, 1.0)
+            new_size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            # Imagem já no tamanho final: sem reamostragem
+            if img.size != new_size:
+                img = img.resize(new_size, Image.Resampling.LANCZOS)
+
+            # Centraliza sobre fundo branco (tela reaproveitada quando o tamanho não muda)
+            if self._canvas is None or self._canvas.size != tuple(target_size):
+                self._canvas = Image.new('L', tuple(target_size), 255)
+            else:
+                self._canvas.paste(255, (0, 0) + self._canvas.size)
+            final_img = self._canvas
+            paste_x = (target_size[0] - new_size[0]) // 2
+            paste_y = (target_size[1] - new_size[1]) // 2
             final_img.paste(img, (paste_x, paste_y))
 
             # Converte para 1-bit (preto e branco) com dithering
-            final_img = final_img.convert('1', dither=Image.Dither.FLOYDSTEINBERG)
-
-            return final_img
+            return dither_to_1bit(final_img)
 
         except Exception as e:
             logger.error(f"Erro ao processar imagem: {e}")
@@ -145,17 +215,21 @@ class AIImageService:
         if not self.api_key:
             return None
 
-        # Gera prompt do dia
-        prompt = self._generate_daily_prompt()
-        prompt_hash = hashlib.md5(prompt.encode()).hexdigest()
+        # Prompt, hash e caminho do cache do dia (memoizados por dia)
+        size = tuple(size)
+        prompt, prompt_hash, cache_path = self._cache_entry_for_day(datetime.now().toordinal(), size)
 
-        # Verifica cache
-        cache_path = self._get_cache_path(prompt_hash)
+        # Imagem já carregada neste processo
+        key = (prompt_hash, size)
+        if self._today_key == key and self._today_img is not None:
+            return self._today_img
 
+        # Verifica cache
         if cache_path.exists():
             try:
-                cached_img = Image.open(cache_path)
+                cached_img = Image.frombytes('1', size, _read_uncached(cache_path))
                 logger.info("Imagem AI carregada do cache")
+                self._today_img, self._today_key = cached_img, key
                 return cached_img
             except Exception as e:
                 logger.warning(f"Erro ao carregar cache: {e}")
@@ -172,11 +246,12 @@ class AIImageService:
 
         # Salva no cache
         try:
-            processed_img.save(cache_path, "PNG")
+            _write_uncached(cache_path, processed_img.tobytes())
             logger.info(f"Imagem AI salva no cache: {cache_path}")
         except Exception as e:
             logger.warning(f"Erro ao salvar cache: {e}")
 
+        self._today_img, self._today_key = processed_img, key
         return processed_img
 
     def clear_cache(self, days_old: int = 7):
@@ -184,10 +259,11 @@ class AIImageService:
         try:
             cutoff_time = datetime.now().timestamp() - (days_old * 24 * 3600)
 
-            for cache_file in self.cache_dir.glob("ai_image_*.png"):
-                if cache_file.stat().st_mtime < cutoff_time:
-                    cache_file.unlink()
-                    logger.info(f"Cache removido: {cache_file}")
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.startswith("ai_image_") and entry.stat().st_mtime < cutoff_time:
+                        os.unlink(entry.path)
+                        logger.info(f"Cache removido: {entry.path}")
 
         except Exception as e:
             logger.warning(f"Erro ao limpar cache: {e}")
\ No newline at end of file
@@ -19,13 +19,14 @@ def check_file_descriptors():
         # Pega lista de arquivos abertos
         open_files = process.open_files()
         connections = process.connections()
+        num_fds = process.num_fds()
         
         print(f"\n{'='*60}")
         print(f"FILE DESCRIPTORS - PID {pid}")
         print(f"{'='*60}")
         print(f"Arquivos abertos: {len(open_files)}")
         print(f"Conex�es de rede: {len(connections)}")
-        print(f"Total FDs: {process.num_fds()}")
+        print(f"Total FDs: {num_fds}")
         
         # Limites do sistema
         import resource
@@ -33,18 +34,21 @@ def check_file_descriptors():
         print(f"\nLimites do sistema:")
         print(f"  Soft limit: {soft}")
         print(f"  Hard limit: {hard}")
-        print(f"  Uso atual: {process.num_fds()}/{soft} ({process.num_fds()*100/soft:.1f}%)")
+        print(f"  Uso atual: {num_fds}/{soft} ({num_fds*100/soft:.1f}%)")
         
-        # Lista arquivos abertos (primeiros 20)
+        # Lista arquivos abertos (primeiros 20) e separa dispositivos SPI numa única passagem
+        spi_devices = []
         if open_files:
             print(f"\nArquivos abertos (primeiros 20):")
-            for f in open_files[:20]:
-                print(f"  - {f.path} (fd={f.fd})")
+            for i, f in enumerate(open_files):
+                if i < 20:
+                    print(f"  - {f.path} (fd={f.fd})")
+                if f.path.startswith('/dev/spi'):
+                    spi_devices.append(f)
             if len(open_files) > 20:
                 print(f"  ... e mais {len(open_files)-20} arquivos")
         
         # Verifica dispositivos SPI
-        spi_devices = [f for f in open_files if 'spi' in f.path.lower()]
         if spi_devices:
             print(f"\n??  ATEN��O: {len(spi_devices)} dispositivos SPI abertos:")
             for f in spi_devices:
@@ -105,12 +109,18 @@ def monitor_process(pid=None, interval=5):
         print(f"{'Tempo':<10} {'FDs':<8} {'Mem(MB)':<10} {'CPU%':<8}")
         print("-" * 40)
         
+        # Primeira leitura de CPU serve só de referência para as seguintes
+        process.cpu_percent(interval=None)
+
         start_time = time.time()
         while True:
             elapsed = int(time.time() - start_time)
-            fds = process.num_fds()
-            mem = process.memory_info().rss / 1024 / 1024
-            cpu = process.cpu_percent(interval=0.1)
+            # oneshot: uma única leitura do /proc para todas as métricas
+            # (cpu_percent sem intervalo mede desde a iteração anterior)
+            with process.oneshot():
+                fds = process.num_fds()
+                mem = process.memory_info().rss / 1024 / 1024
+                cpu = process.cpu_percent(interval=None)
             
             print(f"{elapsed:<10} {fds:<8} {mem:<10.1f} {cpu:<8.1f}")
             time.sleep(interval)
@@ -3,6 +3,7 @@ Configuration management using environment variables and .env file
 """
 
 import os
+import re
 import sys
 import locale
 from datetime import timezone
@@ -24,6 +25,8 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+_INT_RE = re.compile(r'\A[-+]?\d+\Z')
+
 class Config:
     """Centralizes all configuration management"""
 
@@ -49,7 +52,23 @@ class Config:
 
         # Display settings
         self.ROTATE_DISPLAY = self._get_bool('ROTATE_DISPLAY', True)
+        # Clock do SPI do display em Hz (0 = padrão do driver Waveshare, 4 MHz)
+        self.SPI_SPEED_HZ = self._get_int('SPI_SPEED_HZ', 0)
         self.UPDATE_INTERVAL = self._get_int('UPDATE_INTERVAL', 60)
+        # Intervalo (segundos) entre buscas no Google; o relógio continua a cada UPDATE_INTERVAL
+        self.FETCH_INTERVAL = self._get_int('FETCH_INTERVAL', 300)
+        # Espera máxima (segundos) entre buscas após falhas seguidas (o intervalo dobra a cada falha)
+        self.FETCH_BACKOFF_MAX = self._get_int('FETCH_BACKOFF_MAX', 1800)
+        # Na virada do dia, refresh completo só se mudar pelo menos esta % dos pixels (0 = sempre)
+        self.DAY_CHANGE_FULL_PERCENT = self._get_int('DAY_CHANGE_FULL_PERCENT', 40)
+        # Reinício até N segundos após a última atualização pula o Clear e o quadro só com a base (0 = nunca)
+        self.STATE_MAX_AGE = self._get_int('STATE_MAX_AGE', 300)
+        # Pixels alterados em parciais antes de forçar um refresh completo (0 = nunca)
+        self.EINK_PARTIAL_ERASURE_LIMIT = self._get_int('EINK_PARTIAL_ERASURE_LIMIT', 30000)
+        # Refresh completo a cada N atualizações parciais, independente dos pixels alterados (0 = nunca)
+        self.FULL_REFRESH_EVERY = self._get_int('FULL_REFRESH_EVERY', 0)
+        # Parcial enviando só o retângulo alterado (experimental; requer driver com SetWindow/SetCursor)
+        self.EINK_WINDOWED_PARTIAL = self._get_bool('EINK_WINDOWED_PARTIAL', False)
 
         # Event settings
         self.MAX_EVENTS = self._get_int('MAX_EVENTS', 12)
@@ -60,6 +79,7 @@ class Config:
         self.AI_IMAGE_CACHE_DAYS = self._get_int('AI_IMAGE_CACHE_DAYS', 7)
         self.AI_IMAGE_WIDTH = self._get_int('AI_IMAGE_WIDTH', 96)
         self.AI_IMAGE_HEIGHT = self._get_int('AI_IMAGE_HEIGHT', 110)
+        self.AI_IMAGE_MODEL = self._get_str('AI_IMAGE_MODEL', 'dall-e-3')
 
         # AI Image themes (separated by comma)
         default_themes = (
@@ -79,7 +99,10 @@ class Config:
             "um guarda-chuva pixel art em preto e branco,"
             "uma bicicleta pixel art em preto e branco"
         )
-        self.AI_IMAGE_THEMES = [theme.strip() for theme in self._get_str('AI_IMAGE_THEMES', default_themes).split(',') if theme.strip()]
+        self.AI_IMAGE_THEMES = tuple(
+            theme for theme in (t.strip() for t in self._get_str('AI_IMAGE_THEMES', default_themes).split(','))
+            if theme
+        )
 
         # Font paths
         self.FONT_REGULAR = self._get_str('FONT_REGULAR', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf')
@@ -99,7 +122,15 @@ class Config:
         # Google API settings
         self.CREDENTIALS_FILE = self.BASE_DIR / self._get_str('CREDENTIALS_FILE', 'credentials_raspberry-pi.json')
         self.TOKEN_FILE = self.BASE_DIR / self._get_str('TOKEN_FILE', 'token.json')
+        # Última busca de eventos/tasks do dia, usada se a API falhar (ex.: sem rede no boot)
+        self.EVENTS_CACHE_FILE = self.BASE_DIR / self._get_str('EVENTS_CACHE_FILE', 'events_cache.json')
+        # Estado do display (parte estática na tela e página atual) usado com STATE_MAX_AGE
+        self.STATE_FILE = self.BASE_DIR / self._get_str('STATE_FILE', 'state.json')
         self.HEADLESS_OAUTH_PORT = self._get_int('HEADLESS_OAUTH_PORT', 54545)
+        # Listas de calendários/tasks mudam raramente: revalidadas a cada N segundos
+        self.CALENDAR_LIST_CACHE_TTL = self._get_int('CALENDAR_LIST_CACHE_TTL', 3600)
+        # Timeout (segundos) das requisições à API do Google (0 usa o padrão do sistema)
+        self.GOOGLE_HTTP_TIMEOUT = self._get_int('GOOGLE_HTTP_TIMEOUT', 30)
 
         # Google API scopes
         self.SCOPES = [
@@ -126,10 +157,16 @@ class Config:
         self.MSG_AUTH_TITLE = self._get_str('MSG_AUTH_TITLE', '● Google Login ●')
         self.MSG_AUTH_MESSAGE = self._get_str('MSG_AUTH_MESSAGE', 'Autenticação necessária\nSiga o link exibido no log')
 
-        # Initialize derived settings
+        self._timezone = None
+        self._activated = False
+
+    def activate(self):
+        """Apply process-wide side effects (sys.path, log dir, locale); later calls are no-ops"""
+        if self._activated:
+            return
         self._setup_paths()
         self._setup_locale()
-        self._timezone = None
+        self._activated = True
 
     def _get_str(self, key: str, default: str) -> str:
         """Get string environment variable with default"""
@@ -137,11 +174,14 @@ class Config:
 
     def _get_int(self, key: str, default: int) -> int:
         """Get integer environment variable with default"""
-        try:
-            return int(os.getenv(key, str(default)))
-        except ValueError:
-            logger.warning(f"Invalid integer value for {key}, using default: {default}")
+        value = os.getenv(key)
+        if value is None:
             return default
+        value = value.strip()
+        if _INT_RE.match(value):
+            return int(value)
+        logger.warning(f"Invalid integer value for {key}, using default: {default}")
+        return default
 
     def _get_bool(self, key: str, default: bool) -> bool:
         """Get boolean environment variable with default"""
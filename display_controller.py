@@ -3,11 +3,30 @@ E-paper display controller - Fixed version
 Corrige vazamento de file descriptors
 """
 
+import atexit
+import hashlib
 import logging
-from PIL import Image
+import threading
+from typing import Optional, Tuple
+from PIL import Image, ImageDraw
 
 logger = logging.getLogger(__name__)
 
+# Tabela para bytes.translate: inverte os 8 pixels de cada byte (~b, como o driver faz na RAM 0x26)
+_INVERT_BITS = bytes(255 - b for b in range(256))
+
+# Driver Waveshare, importado na criação do primeiro DisplayController (a biblioteca
+# costuma estar em WAVESHARE_LIB_DIR, que só entra no sys.path com Config.activate())
+epd2in13_V2 = None
+
+def _load_epd_module():
+    """Return the Waveshare driver module, importing it on first use"""
+    global epd2in13_V2
+    if epd2in13_V2 is None:
+        from waveshare_epd import epd2in13_V2 as module
+        epd2in13_V2 = module
+    return epd2in13_V2
+
 class DisplayController:
     """Controls e-paper display operations"""
 
@@ -15,7 +34,28 @@ class DisplayController:
         self.config = config
         self._epd = None
         self._initialized = False
-        
+
+        # Uma única thread por vez no SPI/GPIO do painel (loop, tela de login, cleanup do atexit)
+        self._lock = threading.RLock()
+
+        # Último quadro enviado (e-paper é biestável: quadro igual não precisa ser reenviado)
+        self._last_hash = None
+        self._last_buffer = None
+
+        # Estado do controlador: modo LUT carregado e se a imagem base parcial já foi gravada
+        self._mode = None
+        self._base_set = False
+
+        # Pixels alterados por atualizações parciais desde o último refresh completo (ghosting)
+        self._erased_pixels = 0
+        self._partials_since_full = 0
+
+        # Escrita parcial só do retângulo alterado (experimental, depende do driver)
+        self._window_capable = False
+
+        # Empacotamento rápido do framebuffer (validado contra epd.getbuffer na inicialização)
+        self._fast_buffer = False
+
         # Inicializa display apenas uma vez
         self._initialize_display()
 
@@ -26,11 +66,13 @@ class DisplayController:
             return
             
         try:
-            from waveshare_epd import epd2in13_V2
-            
             if self._epd is None:
-                self._epd = epd2in13_V2.EPD()
+                self._epd = _load_epd_module().EPD()
                 logger.info("Display hardware inicializado")
+                self._fast_buffer = self._check_fast_getbuffer()
+                self._window_capable = self._check_window_support()
+                # Garante sleep + liberação do SPI/GPIO mesmo em saídas sem cleanup explícito
+                atexit.register(self.cleanup)
             
             self._initialized = True
             
@@ -41,6 +83,196 @@ class DisplayController:
             logger.error(f"Falha ao inicializar display: {e}")
             raise
 
+    def _fast_getbuffer(self, image: Image.Image, rotate_180: bool = False) -> bytearray:
+        """
+        Pack a frame into the panel's native 1-bit layout using Pillow's C paths
+
+        Equivalent to epd.getbuffer() (portrait, MSB first, rows padded to whole
+        bytes) but rotation and packing are done by transpose() + tobytes()
+        instead of a per-pixel Python loop.
+        """
+        epd = self._epd
+        if image.size == (epd.height, epd.width):
+            # Paisagem -> retrato nativo (mesma rotação do getbuffer da Waveshare)
+            image = image.transpose(Image.ROTATE_270 if rotate_180 else Image.ROTATE_90)
+        elif image.size == (epd.width, epd.height):
+            if rotate_180:
+                image = image.transpose(Image.ROTATE_180)
+        else:
+            if rotate_180:
+                image = image.transpose(Image.ROTATE_180)
+            return epd.getbuffer(image)
+
+        if image.mode != '1':
+            image = image.convert('1')
+
+        # Linhas alinhadas a byte com bits de preenchimento brancos, como no driver
+        padded_w = (epd.width + 7) // 8 * 8
+        if padded_w != epd.width:
+            canvas = Image.new('1', (padded_w, epd.height), 255)
+            canvas.paste(image, (0, 0))
+            image = canvas
+
+        return bytearray(image.tobytes())
+
+    def _check_fast_getbuffer(self) -> bool:
+        """Verify once that _fast_getbuffer matches the driver's getbuffer"""
+        try:
+            pattern = Image.new('1', (self._epd.height, self._epd.width), 255)
+            draw = ImageDraw.Draw(pattern)
+            draw.rectangle([0, 0, 20, 10], fill=0)
+            draw.line([0, 0, pattern.width - 1, pattern.height - 1], fill=0)
+            draw.line([5, pattern.height - 1, 60, 40], fill=0)
+
+            expected = bytes(bytearray(self._epd.getbuffer(pattern)))
+            if bytes(self._fast_getbuffer(pattern)) == expected:
+                return True
+            logger.warning("Empacotamento rápido difere de epd.getbuffer; usando o driver")
+        except Exception as e:
+            logger.warning(f"Falha ao validar empacotamento rápido: {e}")
+        return False
+
+    def _get_buffer(self, image: Image.Image):
+        """Convert a frame (rotated if configured) into the driver's buffer format"""
+        if self._fast_buffer:
+            return self._fast_getbuffer(image, rotate_180=self.config.ROTATE_DISPLAY)
+
+        # Rotate image if configured
+        if self.config.ROTATE_DISPLAY:
+            image = image.transpose(Image.ROTATE_180)
+        return self._epd.getbuffer(image)
+
+    @staticmethod
+    def _count_changed_pixels(old_buffer, new_buffer) -> int:
+        """Count pixels that differ between two packed 1-bit frames"""
+        diff = int.from_bytes(bytes(old_buffer), 'big') ^ int.from_bytes(bytes(new_buffer), 'big')
+        return bin(diff).count('1')
+
+    def changed_ratio(self, image: Image.Image) -> float:
+        """Fraction of pixels that differ from the frame currently on the panel (1.0 if unknown)"""
+        if self._epd is None or self._last_buffer is None:
+            return 1.0
+        changed = self._count_changed_pixels(self._last_buffer, self._get_buffer(image))
+        return changed / (image.width * image.height)
+
+    def _check_window_support(self) -> bool:
+        """Windowed RAM writes need the driver's SetWindow/SetCursor helpers (opt-in)"""
+        if not self.config.EINK_WINDOWED_PARTIAL:
+            return False
+        required = ('SetWindow', 'SetCursor', 'send_command', 'send_data', 'TurnOnDisplayPart')
+        if all(hasattr(self._epd, name) for name in required):
+            return True
+        logger.warning("Driver sem SetWindow/SetCursor; atualização parcial por janela desativada")
+        return False
+
+    def _changed_window(self, old_buffer, new_buffer) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Bounding box of the bytes that differ between two packed frames
+
+        Returns (first_col_byte, last_col_byte, first_row, last_row) in the
+        panel's native orientation, or None when the box is too large for a
+        windowed write to pay off.
+        """
+        linewidth = len(new_buffer) // self._epd.height
+        x0, x1, y0, y1 = linewidth, -1, None, -1
+        for row in range(self._epd.height):
+            start = row * linewidth
+            if old_buffer[start:start + linewidth] == new_buffer[start:start + linewidth]:
+                continue
+            if y0 is None:
+                y0 = row
+            y1 = row
+            for col in range(linewidth):
+                if old_buffer[start + col] != new_buffer[start + col]:
+                    x0 = min(x0, col)
+                    x1 = max(x1, col)
+
+        if y0 is None:
+            return None
+        # Janela grande: mais simples (e quase tão rápido) mandar o quadro inteiro
+        if (x1 - x0 + 1) * (y1 - y0 + 1) * 2 > len(new_buffer):
+            return None
+        return x0, x1, y0, y1
+
+    def _display_partial_window(self, image_buffer, window: Tuple[int, int, int, int]):
+        """
+        Write only the changed rectangle to the controller's RAMs and run a partial refresh
+
+        Mirrors the driver's displayPartial(): the frame goes to RAM 0x24 and its
+        inverse to RAM 0x26, so a later full-frame partial finds both RAMs in
+        the state it expects.
+        """
+        epd = self._epd
+        x0, x1, y0, y1 = window
+        linewidth = len(image_buffer) // epd.height
+        data = b''.join(bytes(image_buffer[row * linewidth + x0:row * linewidth + x1 + 1])
+                        for row in range(y0, y1 + 1))
+
+        epd.SetWindow(x0 * 8, y0, x1 * 8 + 7, y1)
+        epd.SetCursor(x0 * 8, y0)
+        epd.send_command(0x24)
+        self._send_bulk(data)
+
+        # Mesma janela; o cursor volta ao canto dela antes de escrever a segunda RAM
+        epd.SetCursor(x0 * 8, y0)
+        epd.send_command(0x26)
+        self._send_bulk(data.translate(_INVERT_BITS))
+
+        # Restaura a janela completa para as escritas de quadro inteiro do driver
+        epd.SetWindow(0, 0, epd.width - 1, epd.height - 1)
+        epd.SetCursor(0, 0)
+        epd.TurnOnDisplayPart()
+
+    def _init_mode(self, mode):
+        """epd.init() (which reopens the SPI at the driver's default clock) + our SPI clock"""
+        self._epd.init(mode)
+        self._mode = mode
+        self._apply_spi_speed()
+
+    def _apply_spi_speed(self):
+        """Raise the SPI clock to SPI_SPEED_HZ (0 keeps the driver default)"""
+        speed = self.config.SPI_SPEED_HZ
+        if speed <= 0:
+            return
+        try:
+            spi = _load_epd_module().epdconfig.implementation.SPI
+            if spi.max_speed_hz != speed:
+                spi.max_speed_hz = speed
+                logger.info(f"SPI em {speed} Hz")
+        except Exception as e:
+            logger.debug(f"Não foi possível ajustar a velocidade do SPI: {e}")
+
+    def _send_bulk(self, data: bytes):
+        """Send a block of display data in 4 KiB SPI transfers instead of byte by byte"""
+        epd = self._epd
+        if hasattr(epd, 'send_data2'):
+            epd.send_data2(data)
+            return
+
+        epdconfig = _load_epd_module().epdconfig
+        epdconfig.digital_write(epd.dc_pin, 1)
+        epdconfig.digital_write(epd.cs_pin, 0)
+        for offset in range(0, len(data), 4096):
+            epdconfig.spi_writebyte(list(data[offset:offset + 4096]))
+        epdconfig.digital_write(epd.cs_pin, 1)
+
+    def _begin_partial(self, image_buffer):
+        """
+        One-time setup for a series of partial updates
+
+        Writes the base image to both controller RAMs (only if none was written
+        since the last full refresh) and loads the partial LUT. Subsequent
+        frames only need displayPartial().
+        """
+        if not self._base_set:
+            if self._mode != self._epd.FULL_UPDATE:
+                self._init_mode(self._epd.FULL_UPDATE)
+            self._epd.displayPartBaseImage(image_buffer)
+            self._base_set = True
+        # Só recarrega a LUT parcial (e reabre o SPI) ao trocar de modo
+        if self._mode != self._epd.PART_UPDATE:
+            self._init_mode(self._epd.PART_UPDATE)
+
     def show_image(self, image: Image.Image, full_update: bool = False):
         """
         Display image on e-paper
@@ -49,76 +281,135 @@ class DisplayController:
             image: PIL Image to display
             full_update: Whether to use full refresh (True) or partial (False)
         """
-        try:
+        with self._lock:
+            try:
             
-            if self._epd is None:
-                raise RuntimeError("Display não inicializado")
+                if self._epd is None:
+                    raise RuntimeError("Display não inicializado")
 
-            # Rotate image if configured
-            if self.config.ROTATE_DISPLAY:
-                image = image.rotate(180, expand=False)
+                frame_hash = hashlib.blake2b(image.tobytes(), digest_size=8).digest()
+                if frame_hash == self._last_hash and not full_update:
+                    logger.debug("Display: quadro inalterado, atualização ignorada")
+                    return
 
-            image_buffer = self._epd.getbuffer(image)
+                image_buffer = self._get_buffer(image)
 
-            if full_update:
-                self._epd.init(self._epd.FULL_UPDATE)
-                self._epd.Clear(0xFF)
-                self._epd.display(image_buffer)
-                logger.info("Display: FULL update")
-            else:
-                self._epd.displayPartBaseImage(image_buffer)
-                self._epd.init(self._epd.PART_UPDATE)
-                self._epd.displayPartial(image_buffer)
-                logger.info("Display: PARTIAL update")
+                # Parciais acumulam ghosting: após muitos pixels alterados, faz um refresh completo
+                limit = self.config.EINK_PARTIAL_ERASURE_LIMIT
+                if not full_update and limit > 0 and self._last_buffer is not None:
+                    self._erased_pixels += self._count_changed_pixels(self._last_buffer, image_buffer)
+                    if self._erased_pixels > limit:
+                        logger.info(f"Display: {self._erased_pixels} pixels alterados desde o último "
+                                   f"refresh completo, forçando FULL update")
+                        full_update = True
 
-            # Note: Keeping display active instead of sleeping for better responsiveness
-            # epd.sleep()
+                every = self.config.FULL_REFRESH_EVERY
+                if not full_update and every > 0 and self._partials_since_full >= every:
+                    logger.info(f"Display: {self._partials_since_full} atualizações parciais seguidas, forçando FULL update")
+                    full_update = True
 
-        except Exception as e:
-            logger.error(f"Erro ao atualizar display: {e}")
-            # Em caso de erro, tenta reinicializar na próxima vez
-            self._initialized = False
-            raise
+                if full_update:
+                    self._init_mode(self._epd.FULL_UPDATE)
+                    self._epd.Clear(0xFF)
+                    # Grava o quadro como base das próximas atualizações parciais (refresh completo)
+                    self._epd.displayPartBaseImage(image_buffer)
+                    self._base_set = True
+                    self._erased_pixels = 0
+                    self._partials_since_full = 0
+                    logger.info("Display: FULL update")
+                else:
+                    window = None
+                    if not self._base_set or self._mode != self._epd.PART_UPDATE:
+                        self._begin_partial(image_buffer)
+                    elif self._window_capable and self._last_buffer is not None:
+                        window = self._changed_window(self._last_buffer, image_buffer)
+
+                    if window is not None:
+                        self._display_partial_window(image_buffer, window)
+                        logger.debug("Display: PARTIAL update (janela %s)", window)
+                    else:
+                        self._epd.displayPartial(image_buffer)
+                        logger.debug("Display: PARTIAL update")
+                    self._partials_since_full += 1
+
+                self._last_hash = frame_hash
+                self._last_buffer = image_buffer
+
+                # Note: Keeping display active instead of sleeping for better responsiveness
+                # epd.sleep()
+
+            except Exception as e:
+                logger.error(f"Erro ao atualizar display: {e}")
+                # Em caso de erro, tenta reinicializar na próxima vez
+                self._initialized = False
+                self._reset_state()
+                raise
+
+    def _reset_state(self):
+        """Forget cached frame and controller mode (forces a fresh base on next update)"""
+        self._last_hash = None
+        self._last_buffer = None
+        self._mode = None
+        self._base_set = False
+        self._erased_pixels = 0
+        self._partials_since_full = 0
 
     def clear_display(self):
         """Clear the display to white"""
-        try:
-            if self._epd is None:
-                raise RuntimeError("Display não inicializado")
+        with self._lock:
+            try:
+                if self._epd is None:
+                    raise RuntimeError("Display não inicializado")
                 
-            self._epd.init(self._epd.FULL_UPDATE)
-            self._epd.Clear(0xFF)
-            logger.info("Display limpo")
-        except Exception as e:
-            logger.error(f"Erro ao limpar display: {e}")
-            self._initialized = False
-            raise
+                self._reset_state()
+                self._init_mode(self._epd.FULL_UPDATE)
+                self._epd.Clear(0xFF)
+                logger.info("Display limpo")
+            except Exception as e:
+                logger.error(f"Erro ao limpar display: {e}")
+                self._initialized = False
+                raise
 
     def sleep(self):
         """Put display in sleep mode to save power"""
-        try:
-            if self._epd and self._initialized:
-                self._epd.sleep()
-                logger.info("Display em modo sleep")
-        except Exception as e:
-            logger.warning(f"Erro ao colocar display em sleep: {e}")
+        with self._lock:
+            try:
+                if self._epd and self._initialized:
+                    self._epd.sleep()
+                    # Ao acordar o controlador precisa de novo init e nova imagem base
+                    self._mode = None
+                    self._base_set = False
+                    logger.info("Display em modo sleep")
+            except Exception as e:
+                logger.warning(f"Erro ao colocar display em sleep: {e}")
 
     def cleanup(self):
         """Cleanup resources properly"""
-        try:
-            if self._epd and self._initialized:
-                self._epd.sleep()
-                # Cleanup SPI connections
-                try:
-                    self._epd.module_exit()
-                except:
-                    pass
-                logger.info("Display cleanup concluído")
-        except Exception as e:
-            logger.warning(f"Erro no cleanup: {e}")
-        finally:
-            self._epd = None
-            self._initialized = False
+        with self._lock:
+            try:
+                # Depende só do driver aberto: show_image zera _initialized ao falhar, e é
+                # justamente após falhas (reinicialização, saída) que o SPI/GPIO precisa ser solto
+                if self._epd is not None:
+                    try:
+                        self._epd.sleep()
+                    finally:
+                        # Cleanup SPI connections mesmo se sleep() falhar, senão os fds de
+                        # /dev/spidev e do GPIO vazam a cada reinicialização do display
+                        # (module_exit é do epdconfig, não do objeto EPD; drivers recentes
+                        # já o chamam dentro de sleep())
+                        try:
+                            _load_epd_module().epdconfig.module_exit()
+                        except Exception as e:
+                            logger.debug(f"module_exit ignorado: {e}")
+                    logger.info("Display cleanup concluído")
+            except Exception as e:
+                logger.warning(f"Erro no cleanup: {e}")
+            finally:
+                self._epd = None
+                self._initialized = False
+                self._reset_state()
+                # Solta a referência do atexit (um controlador descartado não fica vivo até o fim)
+                atexit.unregister(self.cleanup)
 
     def __del__(self):
         """Cleanup on destruction"""
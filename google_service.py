@@ -3,35 +3,107 @@ Google Calendar and Tasks service integration
 """
 
 import os
+import re
+import json
 import socket
 import getpass
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import List, Tuple, Optional
 
 try:
+    import httplib2
+    from google_auth_httplib2 import AuthorizedHttp
     from google_auth_oauthlib.flow import InstalledAppFlow
     from google.auth.transport.requests import Request
     from google.oauth2.credentials import Credentials
     from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
 except ImportError:
     print("Google API libraries não encontradas. Instale com:")
     print("pip install google-auth google-auth-oauthlib google-auth-httplib2 google-api-python-client")
     raise
 
+try:
+    # Opcional: parser RFC 3339 em C, bem mais rápido que fromisoformat no Pi Zero
+    from ciso8601 import parse_datetime as _parse_rfc3339
+except ImportError:
+    def _parse_rfc3339(value: str) -> datetime:
+        """Parse an RFC 3339 timestamp (fromisoformat in Python 3.7 doesn't accept 'Z')"""
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+from PIL import Image, ImageDraw
+
 from display_controller import DisplayController
-from image_renderer import ImageRenderer
+from image_renderer import FontManager
 
 logger = logging.getLogger(__name__)
 
+# Início de evento RFC 3339 (ex.: 2024-05-01T14:30:00-03:00)
+_RFC3339_RE = re.compile(r"\d{4}-\d{2}-\d{2}T(\d{2}):(\d{2}):\d{2}(?:\.\d+)?(?:([Zz])|([+-])(\d{2}):(\d{2}))\Z")
+
+def _local_hhmm(raw_time: str, tz, local_offset: Optional[int]) -> str:
+    """
+    Convert an RFC 3339 timestamp to local 'HH:MM'
+
+    local_offset is the local UTC offset in minutes, valid for the whole day
+    (None when it changes that day); the regex path then only needs integer
+    arithmetic. Anything else goes through a full datetime parse.
+    """
+    if local_offset is not None:
+        match = _RFC3339_RE.match(raw_time)
+        if match:
+            hh, mm, zulu, sign, off_h, off_m = match.groups()
+            event_offset = 0 if zulu else (int(off_h) * 60 + int(off_m)) * (1 if sign == "+" else -1)
+            minutes = (int(hh) * 60 + int(mm) + local_offset - event_offset) % 1440
+            return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+    return _parse_rfc3339(raw_time).astimezone(tz).strftime("%H:%M")
+
+class AuthRequiredError(Exception):
+    """Google login is needed, but the interactive OAuth flow is not allowed here"""
+
 class GoogleService:
     """Manages Google Calendar and Tasks API interactions"""
 
-    def __init__(self, config):
+    # Máximo de requisições por lote aceito pela API do Google
+    BATCH_LIMIT = 50
+
+    # Renova o token antes da busca quando faltar menos que isso para expirar
+    _REFRESH_LEEWAY = timedelta(minutes=5)
+
+    # Abaixo disso o token não é mais usado: renova antes de requisitar (evita 401 no meio do caminho)
+    _EXPIRY_LEEWAY = timedelta(seconds=60)
+
+    # Respostas parciais: só os campos usados (payload e parse de JSON menores)
+    _CALENDAR_LIST_FIELDS = "etag,items(id)"
+    _EVENT_FIELDS = "nextPageToken,nextSyncToken,items(id,status,summary,location,start,end)"
+    _TASKLIST_FIELDS = "etag,items(id,title)"
+    _TASK_FIELDS = "items(title,due)"
+
+    def __init__(self, config, display: Optional[DisplayController] = None,
+                 font_manager: Optional[FontManager] = None):
         self.config = config
+        # Display e fontes já inicializados pelo main (tela de autenticação)
+        self.display = display
+        self._font_manager = font_manager
         self._credentials = None
         self._calendar_service = None
         self._tasks_service = None
+        self._services_creds_id = None
+        self._list_cache = {}
+        # Sync incremental por calendário: {cal_id: {"window", "token", "events"}}
+        self._sync_state = {}
+        self._refresh_lock = threading.Lock()
+        # Token inválido sem renovação possível: a thread principal precisa chamar login()
+        self.auth_required = False
+        # Se a última busca trouxe eventos e tasks da API (False = usou cache/lista vazia)
+        self.last_fetch_ok = False
+        # Última busca salva em disco: {"date", "events", "tasks"} (carregada sob demanda)
+        self._events_cache = None
 
     def _has_gui_env(self) -> bool:
         """Detect if GUI environment is available"""
@@ -60,25 +132,23 @@ class GoogleService:
 
     def _show_auth_message(self):
         """Show authentication message on e-paper display"""
+        # Só o fluxo interativo chega aqui, na thread principal: a mesma que atualiza o painel
         try:
-            from PIL import Image, ImageDraw
-            from image_renderer import FontManager
-
-            display = DisplayController(self.config)
-            font_manager = FontManager(self.config)
+            display = self.display or DisplayController(self.config)
+            font_manager = self._font_manager or FontManager(self.config)
 
             # Create authentication message image
             img = Image.new("1", (self.config.EPD_WIDTH, self.config.EPD_HEIGHT), 255)
             draw = ImageDraw.Draw(img)
 
             # Title
-            font_title = font_manager.get_font('bold', self.config.FONT_SIZE_TITLE)
+            font_title = font_manager.get_role_font('title')
             title = self.config.MSG_AUTH_TITLE
             tw, th = draw.textsize(title, font=font_title)
             draw.text(((self.config.EPD_WIDTH - tw)//2, 15), title, font=font_title, fill=0)
 
             # Message
-            font_msg = font_manager.get_font('regular', self.config.FONT_SIZE_SUBTITLE)
+            font_msg = font_manager.get_role_font('message')
             msg = self.config.MSG_AUTH_MESSAGE
             lines = msg.split('\n')
             y_offset = 50
@@ -88,7 +158,7 @@ class GoogleService:
                 y_offset += lh + 2
 
             # Google "G" logo placeholder
-            g_font = font_manager.get_font('bold', 36)
+            g_font = font_manager.get_role_font('logo')
             gw, gh = draw.textsize("G", g_font)
             draw.text(((self.config.EPD_WIDTH - gw)//2, self.config.EPD_HEIGHT - gh - 15),
                      "G", font=g_font, fill=0)
@@ -99,12 +169,37 @@ class GoogleService:
         except Exception as e:
             logger.warning(f"Não foi possível exibir mensagem no e-ink: {e}")
 
-    def get_credentials(self) -> Credentials:
-        """Get Google API credentials with automatic refresh"""
-        # Return cached credentials if valid
-        if self._credentials and self._credentials.valid:
+    def _is_fresh(self, creds) -> bool:
+        """Valid and not within _EXPIRY_LEEWAY of expiring"""
+        if not creds or not creds.valid:
+            return False
+        return creds.expiry is None or creds.expiry - datetime.utcnow() > self._EXPIRY_LEEWAY
+
+    def get_credentials(self, interactive: bool = True) -> Credentials:
+        """
+        Get Google API credentials with automatic refresh
+
+        When a new login is needed and interactive is False, sets auth_required
+        and raises AuthRequiredError instead of starting the OAuth flow.
+        """
+        # Return cached credentials if valid (and not about to expire)
+        if self._is_fresh(self._credentials):
             return self._credentials
 
+        # Espera uma renovação em segundo plano em andamento, ou renova aqui mesmo
+        if self._credentials:
+            with self._refresh_lock:
+                if self._is_fresh(self._credentials):
+                    return self._credentials
+                if self._credentials.refresh_token:
+                    try:
+                        self._credentials.refresh(Request())
+                        self._save_token(self._credentials)
+                        logger.info("Token renovado via refresh")
+                        return self._credentials
+                    except Exception as e:
+                        logger.error(f"Falha ao renovar token: {e}")
+
         # Load from file if exists
         creds = None
         if self.config.TOKEN_FILE.exists():
@@ -134,7 +229,11 @@ class GoogleService:
                 logger.error(f"Falha ao renovar token: {e}")
                 creds = None
 
-        # Need to authenticate
+        # Need to authenticate (só na thread principal: o fluxo bloqueia e usa o display)
+        if not interactive:
+            self.auth_required = True
+            raise AuthRequiredError("Login no Google necessário")
+
         if not self.config.CREDENTIALS_FILE.exists():
             raise FileNotFoundError(f"Credenciais não encontradas: {self.config.CREDENTIALS_FILE}")
 
@@ -174,120 +273,452 @@ class GoogleService:
         self._credentials = creds
         return self._credentials
 
-    def _get_calendar_service(self):
+    def refresh_credentials_if_expiring(self):
+        """Refresh the cached token ahead of time when it is close to expiring"""
+        creds = self._credentials
+        if not creds or not creds.refresh_token or not creds.expiry:
+            return
+        if creds.expiry - datetime.utcnow() > self._REFRESH_LEEWAY:
+            return
+
+        with self._refresh_lock:
+            try:
+                creds.refresh(Request())
+                self._save_token(creds)
+                logger.info("Token renovado antes de expirar")
+            except Exception as e:
+                # get_credentials tenta de novo (ou pede login) na busca seguinte
+                logger.warning(f"Falha ao renovar token antecipadamente: {e}")
+
+    def _build_service(self, name: str, version: str, creds):
+        """
+        Build an API client from the discovery document bundled with the library
+
+        Each client owns its HTTP connection (kept alive between fetches);
+        httplib2 is not thread-safe, and Calendar and Tasks are fetched in parallel.
+        """
+        http = AuthorizedHttp(creds, http=httplib2.Http(timeout=self.config.GOOGLE_HTTP_TIMEOUT or None))
+        return build(name, version, http=http, cache_discovery=False, static_discovery=True)
+
+    def login(self):
+        """Show the auth screen and run the interactive OAuth flow (main thread only)"""
+        self._credentials = None
+        self._refresh_services(interactive=True)
+
+    def _refresh_services(self, interactive: bool = True):
+        """Rebuild the API clients only when the credentials object changes"""
+        creds = self.get_credentials(interactive)
+        self.auth_required = False
+        if id(creds) != self._services_creds_id:
+            self._calendar_service = self._build_service("calendar", "v3", creds)
+            self._tasks_service = self._build_service("tasks", "v1", creds)
+            self._services_creds_id = id(creds)
+
+    def _get_calendar_service(self, interactive: bool = True):
         """Get Calendar service instance"""
-        if not self._calendar_service:
-            creds = self.get_credentials()
-            self._calendar_service = build("calendar", "v3", credentials=creds)
+        self._refresh_services(interactive)
         return self._calendar_service
 
-    def _get_tasks_service(self):
+    def _get_tasks_service(self, interactive: bool = True):
         """Get Tasks service instance"""
-        if not self._tasks_service:
-            creds = self.get_credentials()
-            self._tasks_service = build("tasks", "v1", credentials=creds)
+        self._refresh_services(interactive)
         return self._tasks_service
 
-    def get_events_and_tasks(self) -> List[Tuple[str, str, str, str]]:
+    def _cached_list(self, key: str, request) -> list:
         """
-        Get today's events and tasks
-        Returns: List of (time, title, source, location) tuples
+        Return the items of a rarely-changing list resource (calendarList, tasklists)
+
+        Results are reused for CALENDAR_LIST_CACHE_TTL seconds; after that the
+        request is revalidated with If-None-Match, so an unchanged list costs a
+        304 with no body.
         """
-        tz = self.config.get_timezone()
-        today = datetime.now(tz).replace(hour=0, minute=0, second=0, microsecond=0)
-        tomorrow = today + timedelta(days=1)
+        now = time.monotonic()
+        entry = self._list_cache.get(key)
+        if entry and now - entry["ts"] < self.config.CALENDAR_LIST_CACHE_TTL:
+            return entry["items"]
 
-        time_min = today.isoformat()
-        time_max = tomorrow.isoformat()
+        if entry and entry["etag"]:
+            request.headers["If-None-Match"] = entry["etag"]
 
+        try:
+            response = request.execute()
+        except HttpError as e:
+            if entry and e.resp.status == 304:
+                entry["ts"] = now
+                return entry["items"]
+            raise
+
+        items = response.get("items", [])
+        self._list_cache[key] = {"ts": now, "items": items, "etag": response.get("etag")}
+        return items
+
+    def _execute_batched(self, service, requests, callback):
+        """
+        Execute API requests as multipart batches (one HTTP round-trip per batch)
+
+        The callback receives the request's index in `requests` as request_id.
+        """
+        for offset in range(0, len(requests), self.BATCH_LIMIT):
+            batch = service.new_batch_http_request(callback=callback)
+            for index, request in enumerate(requests[offset:offset + self.BATCH_LIMIT], offset):
+                batch.add(request, request_id=str(index))
+            batch.execute()
+
+    @staticmethod
+    def _overlaps_day(event: dict, today: datetime, tomorrow: datetime) -> bool:
+        """Whether an event intersects [today, tomorrow), like timeMin/timeMax on the API"""
+        start = event.get("start", {})
+        end = event.get("end", {})
+        try:
+            if start.get("dateTime"):
+                event_start = _parse_rfc3339(start["dateTime"])
+                event_end = _parse_rfc3339(end.get("dateTime", start["dateTime"]))
+                return event_start < tomorrow and event_end > today
+            if start.get("date"):
+                return start["date"] < tomorrow.date().isoformat() and end.get("date", start["date"]) > today.date().isoformat()
+        except ValueError:
+            pass
+        return False
+
+    def _fetch_events(self, cal_service, tz, today: datetime, tomorrow: datetime,
+                      local_offset: Optional[int] = None) -> Optional[List[Tuple[str, str, str, str]]]:
+        """
+        Fetch today's events from every calendar in the user's list
+
+        The first fetch of the day lists the day window and keeps each
+        calendar's nextSyncToken; later fetches only ask for what changed
+        (syncToken) and merge it into the in-memory copy. Returns None when
+        the calendars could not be listed at all.
+        """
         events = []
-        tasks = []
 
-        # Get calendar events
+        # Com o nome IANA do fuso, o Google já devolve os horários em hora local
+        # (timeZone=...) e HH:MM sai direto da string, sem conversão
+        tz_name = getattr(tz, "key", None) or getattr(tz, "zone", None)
+        extra = {"timeZone": tz_name} if tz_name else {}
+        window = (today.isoformat(), tomorrow.isoformat(), tz_name)
+
+        # Get calendar events (uma requisição HTTP em lote para todos os calendários)
         try:
-            cal_service = self._get_calendar_service()
-            calendars = cal_service.calendarList().list().execute().get("items", [])
-
-            for cal in calendars:
-                cal_id = cal.get("id")
-                if not cal_id:
-                    continue
-
-                try:
-                    cal_events = (
-                        cal_service.events()
-                        .list(
-                            calendarId=cal_id,
-                            timeMin=time_min,
-                            timeMax=time_max,
-                            singleEvents=True,
-                            orderBy="startTime",
-                        )
-                        .execute()
-                        .get("items", [])
-                    )
-
-                    for event in cal_events:
-                        start = event.get("start", {})
-                        raw_time = start.get("dateTime") or start.get("date")
-
-                        if not raw_time:
-                            continue
-
-                        if "T" in raw_time:
-                            # Parse datetime with timezone
-                            event_dt = datetime.fromisoformat(raw_time.replace("Z", "+00:00")).astimezone(tz)
-                            time_str = event_dt.strftime("%H:%M")
+            calendars = self._cached_list("calendars",
+                                          cal_service.calendarList().list(fields=self._CALENDAR_LIST_FIELDS))
+            cal_ids = [cal.get("id") for cal in calendars if cal.get("id")]
+
+            # Estado de outro dia (ou de calendário removido) exige sync completo
+            for cal_id in list(self._sync_state):
+                if cal_id not in cal_ids or self._sync_state[cal_id]["window"] != window:
+                    del self._sync_state[cal_id]
+
+            def list_request(cal_id):
+                state = self._sync_state.get(cal_id)
+                if state:
+                    return cal_service.events().list(calendarId=cal_id, singleEvents=True,
+                                                     syncToken=state["token"], fields=self._EVENT_FIELDS,
+                                                     **extra)
+                return cal_service.events().list(calendarId=cal_id, timeMin=window[0],
+                                                 timeMax=window[1], singleEvents=True,
+                                                 fields=self._EVENT_FIELDS, **extra)
+
+            results = {}
+            resync = []
+
+            def sync_calendars(batch_ids):
+                requests = [list_request(cal_id) for cal_id in batch_ids]
+
+                def on_events(request_id, response, exception):
+                    index = int(request_id)
+                    cal_id = batch_ids[index]
+                    state = self._sync_state.get(cal_id)
+
+                    if exception is not None:
+                        if state and isinstance(exception, HttpError) and exception.resp.status == 410:
+                            # Sync token expirado: refaz a listagem completa do dia
+                            del self._sync_state[cal_id]
+                            resync.append(cal_id)
                         else:
-                            time_str = "Dia todo"
+                            logger.warning(f"Falha ao buscar eventos do calendário {cal_id}: {exception}")
+                            if state:
+                                results[cal_id] = state["events"]
+                        return
+
+                    if state is None:
+                        state = {"window": window, "events": {}}
+                    request = requests[index]
+                    while True:
+                        for event in response.get("items", []):
+                            if event.get("status") == "cancelled":
+                                state["events"].pop(event.get("id"), None)
+                            else:
+                                state["events"][event.get("id")] = event
+                        if not response.get("nextPageToken"):
+                            break
+                        request = cal_service.events().list_next(request, response)
+                        response = request.execute()
+
+                    results[cal_id] = state["events"]
+                    state["token"] = response.get("nextSyncToken")
+                    if state["token"]:
+                        self._sync_state[cal_id] = state
+                    else:
+                        self._sync_state.pop(cal_id, None)
+
+                self._execute_batched(cal_service, requests, on_events)
+
+            sync_calendars(cal_ids)
+            if resync:
+                sync_calendars(resync)
+
+            for cal_id in cal_ids:
+                for event in results.get(cal_id, {}).values():
+                    # Deltas incrementais trazem eventos de qualquer data
+                    if not self._overlaps_day(event, today, tomorrow):
+                        continue
+
+                    start = event.get("start", {})
+                    raw_time = start.get("dateTime") or start.get("date")
+
+                    if not raw_time:
+                        continue
+
+                    if "T" not in raw_time:
+                        time_str = "Dia todo"
+                    elif tz_name:
+                        # Já no fuso local: YYYY-MM-DDTHH:MM...
+                        time_str = raw_time[11:16]
+                    else:
+                        # Parse datetime with timezone
+                        time_str = _local_hhmm(raw_time, tz, local_offset)
+
+                    title = event.get("summary", "(Sem título)")
+                    location = event.get("location", "")
+                    events.append((time_str, title, "Calendar", location))
+
+        except Exception as e:
+            logger.error(f"Erro ao listar calendários: {e}")
+            return None
+
+        return events
 
-                        title = event.get("summary", "(Sem título)")
-                        location = event.get("location", "")
-                        events.append((time_str, title, "Calendar", location))
+    def _fetch_tasks(self, tasks_service, tz, today: datetime,
+                     tomorrow: datetime) -> Optional[List[Tuple[str, str, str, str]]]:
+        """Fetch pending tasks due today from every task list (None if the lists could not be read)"""
+        tasks = []
 
-                except Exception as e:
-                    logger.warning(f"Falha ao buscar eventos do calendário {cal_id}: {e}")
+        # Get tasks (idem, um lote para todas as listas)
+        try:
+            task_lists = self._cached_list("tasklists",
+                                           tasks_service.tasklists().list(maxResults=10,
+                                                                          fields=self._TASKLIST_FIELDS))
+
+            def on_tasks(request_id, response, exception):
+                task_list = task_lists[int(request_id)]
+                if exception is not None:
+                    logger.warning(f"Falha ao buscar tasks da lista {task_list.get('title', '?')}: {exception}")
+                    return
+
+                for task in response.get("items", []):
+                    due = task.get("due")
+                    if due:
+                        task_dt = _parse_rfc3339(due).astimezone(tz)
+                        if today <= task_dt < tomorrow:
+                            time_str = task_dt.strftime("%H:%M")
+                            title = task.get("title", "(Sem título)")
+                            tasks.append((time_str, title, "Task", ""))
+
+            self._execute_batched(tasks_service, [
+                tasks_service.tasks().list(tasklist=task_list["id"], showCompleted=False,
+                                           fields=self._TASK_FIELDS)
+                for task_list in task_lists
+            ], on_tasks)
 
         except Exception as e:
-            logger.error(f"Erro ao listar calendários: {e}")
+            logger.error(f"Erro ao listar task lists: {e}")
+            return None
+
+        return tasks
+
+    def _load_events_cache(self, day: str) -> Optional[dict]:
+        """Last saved fetch for the given day (None if missing or from another day)"""
+        if self._events_cache is None:
+            self._events_cache = {}
+            try:
+                with open(self.config.EVENTS_CACHE_FILE, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._events_cache = {
+                    "date": data["date"],
+                    "events": [tuple(item) for item in data["events"]],
+                    "tasks": [tuple(item) for item in data["tasks"]],
+                }
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Cache de eventos inválido, ignorando: {e}")
+
+        if self._events_cache.get("date") != day:
+            return None
+        return self._events_cache
+
+    def _save_events_cache(self, day: str, events: list, tasks: list):
+        """Persist the fetch so a restart or network outage can fall back to it"""
+        data = {"date": day, "events": events, "tasks": tasks}
+        if data == self._events_cache:
+            return
 
-        # Get tasks
         try:
-            tasks_service = self._get_tasks_service()
-            task_lists = tasks_service.tasklists().list(maxResults=10).execute().get("items", [])
-
-            for task_list in task_lists:
-                try:
-                    task_items = (
-                        tasks_service.tasks()
-                        .list(tasklist=task_list["id"], showCompleted=False)
-                        .execute()
-                        .get("items", [])
-                    )
-
-                    for task in task_items:
-                        due = task.get("due")
-                        if due:
-                            task_dt = datetime.fromisoformat(due.replace("Z", "+00:00")).astimezone(tz)
-                            if today <= task_dt < tomorrow:
-                                time_str = task_dt.strftime("%H:%M")
-                                title = task.get("title", "(Sem título)")
-                                tasks.append((time_str, title, "Task", ""))
-
-                except Exception as e:
-                    logger.warning(f"Falha ao buscar tasks da lista {task_list.get('title', '?')}: {e}")
+            path = str(self.config.EVENTS_CACHE_FILE)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._events_cache = data
+        except Exception as e:
+            logger.warning(f"Falha ao salvar cache de eventos: {e}")
 
+    def get_events_and_tasks(self, interactive: bool = True) -> List[Tuple[str, str, str, str]]:
+        """
+        Get today's events and tasks
+        Returns: List of (time, title, source, location) tuples
+
+        interactive=False never starts the OAuth flow (see get_credentials).
+        """
+        tz = self.config.get_timezone()
+        today = datetime.now(tz).replace(hour=0, minute=0, second=0, microsecond=0)
+        tomorrow = today + timedelta(days=1)
+
+        # Offset local fixo no dia (sem troca de horário de verão) permite converter horários sem datetime
+        local_offset = None
+        if today.utcoffset() == tomorrow.utcoffset():
+            local_offset = int(today.utcoffset().total_seconds()) // 60
+
+        events = None
+        tasks = None
+
+        # Os serviços são obtidos aqui, antes das buscas paralelas (o fluxo OAuth só com
+        # interactive=True, na thread principal); cada um tem sua própria conexão HTTP
+        try:
+            cal_service = self._get_calendar_service(interactive)
+        except Exception as e:
+            logger.error(f"Erro ao listar calendários: {e}")
+            cal_service = None
+
+        try:
+            tasks_service = self._get_tasks_service(interactive)
         except Exception as e:
             logger.error(f"Erro ao listar task lists: {e}")
+            tasks_service = None
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            events_future = tasks_future = None
+            if cal_service is not None:
+                events_future = pool.submit(self._fetch_events, cal_service, tz, today, tomorrow, local_offset)
+            if tasks_service is not None:
+                tasks_future = pool.submit(self._fetch_tasks, tasks_service, tz, today, tomorrow)
+
+            if events_future is not None:
+                events = events_future.result()
+            if tasks_future is not None:
+                tasks = tasks_future.result()
+
+        # Sem rede/API: usa o que foi buscado hoje (sobrevive a reinícios via arquivo)
+        day = today.date().isoformat()
+        self.last_fetch_ok = events is not None and tasks is not None
+        fetched = events is not None or tasks is not None
+        if events is None or tasks is None:
+            cached = self._load_events_cache(day)
+            if cached:
+                logger.warning("Falha ao buscar dados do Google, usando a última busca salva de hoje")
+            else:
+                cached = {"events": [], "tasks": []}
+            if events is None:
+                events = list(cached["events"])
+            if tasks is None:
+                tasks = list(cached["tasks"])
+        if fetched:
+            self._save_events_cache(day, events, tasks)
 
         # Combine and sort
         all_items = events + tasks
 
         def sort_key(item):
+            # Minutos desde a meia-noite; "Dia todo" vem antes de tudo
             time_str = item[0]
-            return "00:00" if time_str == "Dia todo" else time_str
+            if time_str == "Dia todo":
+                return -1
+            return int(time_str[:2]) * 60 + int(time_str[3:5])
 
         all_items.sort(key=sort_key)
 
         logger.info(f"Dados carregados: eventos={len(events)}, tasks={len(tasks)}, total={len(all_items)}")
-        return all_items[:self.config.MAX_EVENTS]
\ No newline at end of file
+        return all_items[:self.config.MAX_EVENTS]
+
+
+class GoogleFetcher:
+    """
+    Keeps today's events and tasks fresh on a background thread
+
+    Exposes the same get_events_and_tasks() used by ImageRenderer, but returns
+    the last fetched items immediately, so the clock repaint never waits on the
+    network. Token renewal also happens here, never while rendering.
+    """
+
+    # Limite do expoente do backoff (evita inteiros enormes em quedas muito longas)
+    _MAX_BACKOFF_STEPS = 16
+
+    def __init__(self, google_service: GoogleService, interval: int, max_interval: int = 0):
+        self._service = google_service
+        self._interval = interval
+        # Espera máxima entre tentativas após falhas seguidas (0 = sem backoff)
+        self._max_interval = max(max_interval, interval)
+        self._items = []
+        self._stop = threading.Event()
+        self._thread = None
+        # Uma busca por vez (os clientes HTTP da API não são thread-safe)
+        self._fetch_lock = threading.Lock()
+
+    @property
+    def auth_required(self) -> bool:
+        """True when the background fetch needs a new login (see GoogleService.login)"""
+        return self._service.auth_required
+
+    def fetch(self, interactive: bool = False):
+        """Fetch now and publish the items (interactive OAuth only from the main thread)"""
+        with self._fetch_lock:
+            # Troca a referência inteira: leitores sempre veem uma lista completa
+            self._items = self._service.get_events_and_tasks(interactive)
+
+    def start(self):
+        """Fetch once synchronously (handles first-time OAuth), then refresh in background"""
+        self.fetch(interactive=True)
+        self._thread = threading.Thread(target=self._run, name="google-fetch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop.set()
+
+    def _next_delay(self, failures: int) -> float:
+        """Interval doubled for each consecutive failed fetch, capped at max_interval"""
+        steps = min(failures, self._MAX_BACKOFF_STEPS)
+        return min(self._interval * 2 ** steps, self._max_interval)
+
+    def _run(self):
+        failures = 0
+        while not self._stop.wait(self._next_delay(failures)):
+            try:
+                self._service.refresh_credentials_if_expiring()
+                # Nunca abre o fluxo OAuth aqui: só marca auth_required para o main
+                self.fetch()
+                ok = self._service.last_fetch_ok
+            except Exception as e:
+                logger.error(f"Erro ao atualizar eventos em segundo plano: {e}")
+                ok = False
+
+            # Queda de rede/DNS ou 5xx: espaça as tentativas até a API voltar a responder
+            failures = 0 if ok else failures + 1
+            if failures:
+                logger.warning(f"Busca no Google falhou {failures} vez(es) seguidas; "
+                               f"próxima tentativa em {self._next_delay(failures):.0f}s")
+
+    def get_events_and_tasks(self) -> List[Tuple[str, str, str, str]]:
+        """Last fetched (time, title, source, location) tuples"""
+        return self._items
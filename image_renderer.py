@@ -5,8 +5,12 @@ Image rendering for e-paper display
 import os
 import io
 import time
+import hashlib
+import locale
 import logging
+import functools
 import calendar as pycal
+from collections import OrderedDict
 from datetime import datetime
 from typing import List, Tuple, Optional
 
@@ -14,41 +18,88 @@ from PIL import Image, ImageDraw, ImageFont
 
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=32)
+def _load_font(font_path: str, size: int) -> ImageFont.FreeTypeFont:
+    """Parse a TrueType font once per (path, size), shared by every FontManager"""
+    try:
+        return ImageFont.truetype(font_path, size)
+    except Exception as e:
+        logger.warning(f"Falha ao carregar fonte {font_path} tamanho {size}: {e}")
+        return ImageFont.load_default()
+
+# Semana começando no domingo (sem alterar o firstweekday global do módulo calendar)
+_CALENDAR = pycal.Calendar(firstweekday=pycal.SUNDAY)
+
+def _week_names() -> List[str]:
+    """Two-letter weekday headers in _CALENDAR order (same as weekheader(2) in the active locale)"""
+    return [pycal.day_abbr[day][:2].strip() for day in _CALENDAR.iterweekdays()]
+
 class FontManager:
     """Manages font loading and caching"""
 
+    # Papel -> (tipo de fonte, atributo de tamanho no Config ou tamanho fixo)
+    FONT_ROLES = {
+        'title': ('bold', 'FONT_SIZE_TITLE'),
+        'subtitle': ('bold', 'FONT_SIZE_SUBTITLE'),
+        'message': ('regular', 'FONT_SIZE_SUBTITLE'),
+        'regular': ('regular', 'FONT_SIZE_REGULAR'),
+        'small': ('regular', 'FONT_SIZE_SMALL'),
+        'calendar_title': ('bold', 'FONT_SIZE_CALENDAR_TITLE'),
+        'calendar_day': ('regular', 'FONT_SIZE_CALENDAR_DAY'),
+        'time': ('bold', 'FONT_SIZE_TIME'),
+        'emoji': ('regular', 'FONT_SIZE_EMOJI'),
+        'no_events': ('regular', 'FONT_SIZE_NO_EVENTS'),
+        'version': ('regular', 6),
+        'logo': ('bold', 36),
+    }
+
     def __init__(self, config):
         self.config = config
-        self._font_cache = {}
 
-    def get_font(self, font_type: str, size: int) -> ImageFont.FreeTypeFont:
-        """Get font with caching"""
-        cache_key = f"{font_type}_{size}"
+    def role_size(self, role: str) -> int:
+        """Point size configured for a layout role"""
+        size = self.FONT_ROLES[role][1]
+        if isinstance(size, str):
+            size = getattr(self.config, size)
+        return size
 
-        if cache_key in self._font_cache:
-            return self._font_cache[cache_key]
+    def get_role_font(self, role: str) -> ImageFont.FreeTypeFont:
+        """Get font for a layout role (see FONT_ROLES)"""
+        return self.get_font(self.FONT_ROLES[role][0], self.role_size(role))
 
-        if font_type == 'bold':
-            font_path = self.config.FONT_BOLD
-        else:
-            font_path = self.config.FONT_REGULAR
+    def preload(self):
+        """Load every role's font up front, so the first render doesn't parse TTF files"""
+        for role in self.FONT_ROLES:
+            self.get_role_font(role)
 
-        try:
-            font = ImageFont.truetype(font_path, size)
-            self._font_cache[cache_key] = font
-            return font
-        except Exception as e:
-            logger.warning(f"Falha ao carregar fonte {font_path} tamanho {size}: {e}")
-            default_font = ImageFont.load_default()
-            self._font_cache[cache_key] = default_font
-            return default_font
+    def get_font(self, font_type: str, size: int) -> ImageFont.FreeTypeFont:
+        """Get font (cached by _load_font per path and size)"""
+        font_path = self.config.FONT_BOLD if font_type == 'bold' else self.config.FONT_REGULAR
+        return _load_font(font_path, size)
+
+class _DynamicFrame:
+    """Working buffer for render_dynamic and what is currently drawn on it"""
+
+    def __init__(self):
+        self.img = None
+        self.draw = None
+        self.base = None
+        self.time_text = None
+        self.events_key = None
 
 class ImageRenderer:
     """Handles all image rendering operations"""
 
+    # Máximo de medidas de texto mantidas em memória
+    TEXT_SIZE_CACHE_SIZE = 512
+
+    # Após falha da imagem AI, o painel "Dia livre" é redesenhado (nova tentativa) a cada N segundos
+    AI_RETRY_INTERVAL = 600
+
     def __init__(self, config):
         self.config = config
         self.font_manager = FontManager(config)
+        self.font_manager.preload()
 
         # Initialize AI image service if enabled
         self._ai_service = None
@@ -59,15 +110,54 @@ class ImageRenderer:
             except Exception as e:
                 logger.warning(f"Falha ao inicializar AI Image Service: {e}")
 
+        # Parte estática (calendário) fica em disco, uma por dia
+        self._cache_dir = str(config.BASE_DIR / 'image_cache')
+        self._static_signature = self._get_static_signature()
+
+        # Medidas de texto já calculadas: {(fonte, texto): (largura, altura)}, em ordem LRU
+        # (títulos de eventos mudam com o tempo, então o cache é limitado)
+        self._text_sizes = OrderedDict()
+
+        # Larguras por caractere de cada fonte (truncamento de texto)
+        self._char_widths = {}
+
+        # Máscaras dos números dos dias do calendário
+        self._glyph_cache = {}
+
+        # A última tentativa de desenhar a imagem AI falhou (o painel vazio deve tentar de novo)
+        self._ai_failed = False
+
+        # Layouts do calendário mensal: {(ano, mês, x, y, largura, altura): layout}
+        self._month_layouts = {}
+
+        # Contexto só para medir texto (layouts calculados fora de um quadro)
+        self._measure_draw = ImageDraw.Draw(Image.new("1", (1, 1)))
+
+        # Frames dinâmicos persistentes (buffer duplo: um pode estar indo para o display
+        # enquanto o próximo é desenhado); só as regiões que mudaram são redesenhadas
+        self._frames = [_DynamicFrame(), _DynamicFrame()]
+        self._frame_index = 0
+
     def _text_size(self, draw: ImageDraw.ImageDraw, text: str, font: ImageFont.FreeTypeFont) -> Tuple[int, int]:
-        """Get text size, compatible with Pillow 10+"""
-        try:
-            # Try new method first (Pillow 10+)
-            bbox = draw.textbbox((0, 0), text, font=font)
-            return bbox[2] - bbox[0], bbox[3] - bbox[1]
-        except AttributeError:
-            # Fallback to old method
-            return draw.textsize(text, font=font)
+        """Get text size from the font metrics, compatible with Pillow 10+ (memoized per font and text)"""
+        key = (font, text)
+        size = self._text_sizes.get(key)
+        if size is not None:
+            self._text_sizes.move_to_end(key)
+            return size
+
+        if hasattr(font, 'getbbox'):
+            # Pillow 8+: mede direto na fonte, no mesmo modo "1" usado por draw.textbbox
+            left, top, right, bottom = font.getbbox(text, '1')
+            size = right - left, bottom - top
+        else:
+            # Pillow < 8 (5.4.1 do Pi OS): mesmo cálculo de draw.textsize
+            size = font.getsize(text)
+
+        self._text_sizes[key] = size
+        if len(self._text_sizes) > self.TEXT_SIZE_CACHE_SIZE:
+            self._text_sizes.popitem(last=False)
+        return size
 
     def _multiline_text_size(self, draw: ImageDraw.ImageDraw, text: str, font: ImageFont.FreeTypeFont) -> Tuple[int, int]:
         """Get multiline text size"""
@@ -82,58 +172,108 @@ class ImageRenderer:
 
         return max_width, total_height
 
+    def _char_width(self, font: ImageFont.FreeTypeFont, char: str) -> float:
+        """Advance width of a single character, cached per font"""
+        widths = self._char_widths.get(font)
+        if widths is None:
+            widths = self._char_widths[font] = {}
+        width = widths.get(char)
+        if width is None:
+            if hasattr(font, 'getlength'):
+                width = font.getlength(char)
+            else:
+                # Pillow < 8
+                width = font.getsize(char)[0]
+            widths[char] = width
+        return width
+
     def _truncate_text(self, draw: ImageDraw.ImageDraw, text: str, max_width: int, font: ImageFont.FreeTypeFont) -> str:
         """Truncate text to fit within max_width"""
         if self._text_size(draw, text, font)[0] <= max_width:
             return text
 
-        # Binary search for optimal length
-        low, high = 0, len(text)
-        while low < high:
-            mid = (low + high) // 2
-            candidate = text[:mid] + "..."
-            if self._text_size(draw, candidate, font)[0] <= max_width:
-                low = mid + 1
-            else:
-                high = mid
-
-        result = text[:max(low - 1, 0)] + ("..." if len(text) > 1 else "")
+        # Estima o corte somando larguras por caractere (sem medir substrings)
+        budget = max_width - sum(self._char_width(font, c) for c in "...")
+        cut = 0
+        for char in text:
+            budget -= self._char_width(font, char)
+            if budget < 0:
+                break
+            cut += 1
+
+        # Confirma com a medida real (kerning/bearings podem deslocar a estimativa)
+        while cut > 0 and self._text_size(draw, text[:cut] + "...", font)[0] > max_width:
+            cut -= 1
+        while cut < len(text) - 1 and self._text_size(draw, text[:cut + 1] + "...", font)[0] <= max_width:
+            cut += 1
+
+        result = text[:cut] + ("..." if len(text) > 1 else "")
         return result or "..."
 
-    def _draw_month_calendar(self, draw: ImageDraw.ImageDraw, x: int, y: int,
-                           width: int, height: int, current_date: datetime):
-        """Draw monthly calendar grid"""
-        title_font = self.font_manager.get_font('bold', self.config.FONT_SIZE_CALENDAR_TITLE)
-        dayname_font = self.font_manager.get_font('regular', self.config.FONT_SIZE_REGULAR)
-        day_font = self.font_manager.get_font('regular', self.config.FONT_SIZE_CALENDAR_DAY)
+    def _day_glyph(self, font: ImageFont.FreeTypeFont, text: str) -> Image.Image:
+        """1-bit mask of a day number, rasterized once per font and reused via draw.bitmap"""
+        key = (font, text)
+        glyph = self._glyph_cache.get(key)
+        if glyph is None:
+            if hasattr(font, 'getbbox'):
+                size = font.getbbox(text)[2:]
+            else:
+                # Pillow < 8
+                size = font.getsize(text)
+            glyph = Image.new("1", (max(size[0], 1), max(size[1], 1)), 0)
+            ImageDraw.Draw(glyph).text((0, 0), text, font=font, fill=255)
+            self._glyph_cache[key] = glyph
+        return glyph
+
+    def _month_layout(self, year: int, month: int, x: int, y: int, width: int, height: int):
+        """
+        Compute the month calendar layout once per (month, box)
+
+        Returns (title, title_xy, headers, cells) where headers is a tuple of
+        (xy, name) and cells a tuple of (day, day_str, text_xy, cell_box).
+        """
+        key = (year, month, x, y, width, height)
+        layout = self._month_layouts.get(key)
+        if layout is None:
+            # Só o mês corrente interessa: layouts de meses anteriores são descartados
+            if len(self._month_layouts) >= 4:
+                self._month_layouts.clear()
+            layout = self._compute_month_layout(year, month, x, y, width, height)
+            self._month_layouts[key] = layout
+        return layout
+
+    def _compute_month_layout(self, year: int, month: int, x: int, y: int, width: int, height: int):
+        """Uncached body of _month_layout"""
+        draw = self._measure_draw
+        title_font = self.font_manager.get_role_font('calendar_title')
+        dayname_font = self.font_manager.get_role_font('regular')
+        day_font = self.font_manager.get_role_font('calendar_day')
 
         # Month title
-        month_name = current_date.strftime(" %B %Y ")
+        month_name = datetime(year, month, 1).strftime(" %B %Y ")
         tw, th = self._text_size(draw, month_name, title_font)
-        draw.text((x + (width - tw)//2, y), month_name, font=title_font, fill=0)
+        title_xy = (x + (width - tw)//2, y)
 
         # Week day headers
         top_after_title = y + th + 2
-        pycal.setfirstweekday(6)
-        week_names = pycal.weekheader(2).split()
-        cal = pycal.Calendar(firstweekday=pycal.SUNDAY)
+        week_names = _week_names()
         cell_w = width // 7
 
         header_y = top_after_title
+        headers = []
         for i, day_name in enumerate(week_names):
             wd_w, _ = self._text_size(draw, day_name, dayname_font)
             tx = x + i * cell_w + (cell_w - wd_w) // 2
-            draw.text((tx, header_y), day_name, font=dayname_font, fill=0)
+            headers.append(((tx, header_y), day_name))
 
         # Calendar grid
         grid_top = header_y + dayname_font.size + 2
-        month_grid = cal.monthdayscalendar(current_date.year, current_date.month)
+        month_grid = _CALENDAR.monthdayscalendar(year, month)
         weeks = len(month_grid)
         cell_h = max(14, (height - (grid_top - y) - 2) // weeks)
 
+        cells = []
         current_y = grid_top
-        today_num = current_date.day
-
         for row in month_grid:
             for col, day in enumerate(row):
                 if day:
@@ -142,28 +282,46 @@ class ImageRenderer:
 
                     day_str = str(day)
                     txt_w, txt_h = self._text_size(draw, day_str, day_font)
-                    tx = cell_x + cell_w - txt_w - 2
-                    ty = cell_y + 1
-
-                    # Highlight today
-                    if day == today_num:
-                        draw.rectangle([cell_x + 1, cell_y + 1,
-                                      cell_x + cell_w - 2, cell_y + cell_h - 2],
-                                     outline=0, fill=0)
-                        draw.text((tx, ty), day_str, font=day_font, fill=255)
-                    else:
-                        draw.text((tx, ty), day_str, font=day_font, fill=0)
+                    text_xy = (cell_x + cell_w - txt_w - 2, cell_y + 1)
+                    cell_box = (cell_x + 1, cell_y + 1, cell_x + cell_w - 2, cell_y + cell_h - 2)
+                    cells.append((day, day_str, text_xy, cell_box))
 
             current_y += cell_h
 
-    def _draw_time_block(self, draw: ImageDraw.ImageDraw, x: int, y: int,
+        return month_name, title_xy, tuple(headers), tuple(cells)
+
+    def _draw_month_calendar(self, draw: ImageDraw.ImageDraw, x: int, y: int,
+                           width: int, height: int, current_date: datetime):
+        """Draw monthly calendar grid"""
+        title_font = self.font_manager.get_role_font('calendar_title')
+        dayname_font = self.font_manager.get_role_font('regular')
+        day_font = self.font_manager.get_role_font('calendar_day')
+
+        month_name, title_xy, headers, cells = self._month_layout(
+            current_date.year, current_date.month, x, y, width, height)
+
+        draw.text(title_xy, month_name, font=title_font, fill=0)
+        for xy, day_name in headers:
+            draw.text(xy, day_name, font=dayname_font, fill=0)
+
+        # Só o destaque do dia atual depende da data
+        today_num = current_date.day
+        for day, day_str, text_xy, cell_box in cells:
+            glyph = self._day_glyph(day_font, day_str)
+            if day == today_num:
+                draw.rectangle(cell_box, outline=0, fill=0)
+                draw.bitmap(text_xy, glyph, fill=255)
+            else:
+                draw.bitmap(text_xy, glyph, fill=0)
+
+    def _draw_time_block(self, draw: ImageDraw.ImageDraw, img: Image.Image, x: int, y: int,
                         width: int, current_time: datetime):
         """Draw time display block"""
-        time_font = self.font_manager.get_font('bold', self.config.FONT_SIZE_TIME)
+        time_font = self.font_manager.get_role_font('time')
         time_text = current_time.strftime("%H:%M")
 
-        # Black background
-        draw.rectangle([x, y, x + width, y + self.config.TIME_BLOCK_H], fill=0)
+        # Black background (paste de cor sólida: preenchimento direto no buffer)
+        img.paste(0, (x, y, x + width + 1, y + self.config.TIME_BLOCK_H + 1))
 
         # White text centered
         tw, _ = self._text_size(draw, time_text, time_font)
@@ -186,7 +344,7 @@ class ImageRenderer:
                 img.paste(ai_image, (paste_x, paste_y))
 
                 # Add a simple title
-                title_font = self.font_manager.get_font('bold', self.config.FONT_SIZE_SUBTITLE)
+                title_font = self.font_manager.get_role_font('subtitle')
                 title = "Arte do Dia"
                 tw, _ = self._text_size(draw, title, title_font)
                 draw.text((x + (width - tw)//2, y + 5), title, font=title_font, fill=0)
@@ -203,10 +361,10 @@ class ImageRenderer:
                     width: int, height: int, items: List[Tuple[str, str, str, str]],
                     page_index: int = 0, total_pages: int = 1):
         """Draw events and tasks list with version footer"""
-        title_font = self.font_manager.get_font('bold', self.config.FONT_SIZE_SUBTITLE)
-        item_font = self.font_manager.get_font('regular', self.config.FONT_SIZE_REGULAR)
-        small_font = self.font_manager.get_font('regular', self.config.FONT_SIZE_SMALL)
-        version_font = self.font_manager.get_font('regular', 6)  # Fonte bem pequena para versão
+        title_font = self.font_manager.get_role_font('subtitle')
+        item_font = self.font_manager.get_role_font('regular')
+        small_font = self.font_manager.get_role_font('small')
+        version_font = self.font_manager.get_role_font('version')  # Fonte bem pequena para versão
 
         # Title bar
         if not items:
@@ -217,7 +375,7 @@ class ImageRenderer:
             title = "Eventos"
 
         # Black title bar
-        draw.rectangle([x, y, x + width, y + self.config.TIME_BLOCK_H], fill=0)
+        img.paste(0, (x, y, x + width + 1, y + self.config.TIME_BLOCK_H + 1))
         tw, _ = self._text_size(draw, title, title_font)
         draw.text((x + (width - tw)//2, y + 2), title, font=title_font, fill=255)
 
@@ -230,22 +388,26 @@ class ImageRenderer:
         # No events - try to show AI image
         if not items:
             # Try to draw AI generated image
-            if self.config.AI_IMAGES_ENABLED and self._draw_ai_image(draw, img, x, current_y, width, available_height):
+            ai_drawn = self.config.AI_IMAGES_ENABLED and self._draw_ai_image(
+                draw, img, x, current_y, width, available_height)
+            self._ai_failed = self._ai_service is not None and not ai_drawn
+            if ai_drawn:
                 # AI image was drawn successfully, still draw version footer
                 pass
             else:
                 # Fallback to original "Dia livre" message
-                no_events_font = self.font_manager.get_font('regular', self.config.FONT_SIZE_NO_EVENTS)
+                no_events_font = self.font_manager.get_role_font('no_events')
                 msg = self.config.MSG_FREE_DAY
                 mw, _ = self._text_size(draw, msg, no_events_font)
-                draw.text((x + (width - mw)//2 - 18, current_y + 10), msg, font=no_events_font, fill=0)
+                # Nunca à esquerda de x + 1 (fora da área que o render incremental limpa)
+                draw.text((max(x + (width - mw)//2 - 18, x + 1), current_y + 10), msg, font=no_events_font, fill=0)
 
                 # Happy emoji
                 try:
-                    emoji_font = self.font_manager.get_font('regular', self.config.FONT_SIZE_EMOJI)
+                    emoji_font = self.font_manager.get_role_font('emoji')
                     emoji = self.config.MSG_EMOJI_HAPPY
                     ew, _ = self._text_size(draw, emoji, emoji_font)
-                    draw.text((x + (width - ew)//2 - 10, current_y + 35), emoji, font=emoji_font, fill=0)
+                    draw.text((max(x + (width - ew)//2 - 10, x + 1), current_y + 35), emoji, font=emoji_font, fill=0)
                 except Exception:
                     # Fallback if emoji doesn't render
                     pass
@@ -272,7 +434,7 @@ class ImageRenderer:
                     current_y += self.config.LINE_SPACING
 
                 # Separator line
-                draw.line([x, current_y, x + width, current_y], fill=0)
+                img.paste(0, (x, current_y, x + width + 1, current_y + 1))
                 current_y += 2
 
         # NOVO: Desenhar rodapé com versão
@@ -286,11 +448,75 @@ class ImageRenderer:
         # Desenhar versão em cinza claro (simulado com pontilhado)
         draw.text((version_x, version_y), version_text, font=version_font, fill=0)
 
+    def _get_static_signature(self) -> str:
+        """
+        Short hash of everything the static layer depends on besides the date
+
+        Font files (path and mtime) and sizes, panel geometry and the LC_TIME
+        locale (month and weekday names), so changing any of them invalidates
+        the cached layer.
+        """
+        parts = []
+        for font_path in (self.config.FONT_REGULAR, self.config.FONT_BOLD):
+            try:
+                mtime = os.path.getmtime(font_path)
+            except OSError:
+                mtime = 0
+            parts.append(f"{font_path}:{mtime}")
+        for role in sorted(FontManager.FONT_ROLES):
+            parts.append(f"{role}:{self.font_manager.role_size(role)}")
+        for name in ('MARGIN', 'LEFT_PANEL_W', 'RIGHT_PANEL_W', 'TIME_BLOCK_H'):
+            parts.append(f"{name}:{getattr(self.config, name)}")
+        parts.append(f"LC_TIME:{locale.setlocale(locale.LC_TIME)}")
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:8]
+
+    def _static_cache_path(self, day) -> str:
+        """Cache file for the static layer of a given day (and the current fonts and layout)"""
+        return os.path.join(self._cache_dir,
+                            f"static_{day.isoformat()}_{self.config.EPD_WIDTH}x{self.config.EPD_HEIGHT}"
+                            f"_{self._static_signature}.bin")
+
+    def _load_static_cache(self, path: str) -> Optional[Image.Image]:
+        """Load a cached static layer (raw 1-bit bytes), or None"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            return Image.frombytes("1", (self.config.EPD_WIDTH, self.config.EPD_HEIGHT), data)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Cache da parte estática inválido ({path}): {e}")
+            return None
+
+    def _save_static_cache(self, path: str, img: Image.Image):
+        """Store the static layer and drop the files of previous days"""
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            with os.scandir(self._cache_dir) as it:
+                for entry in it:
+                    if entry.name.startswith("static_") and entry.path != path:
+                        os.remove(entry.path)
+
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(img.tobytes())
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Falha ao salvar cache da parte estática: {e}")
+
     def render_static(self) -> Image.Image:
-        """Render static elements (calendar grid)"""
+        """Render static elements (calendar grid), reusing today's cached copy if present"""
         start_time = time.perf_counter()
 
         current_time = datetime.now(self.config.get_timezone())
+        cache_path = self._static_cache_path(current_time.date())
+
+        img = self._load_static_cache(cache_path)
+        if img is not None:
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            logger.info(f"Render estática carregada do cache em {elapsed_ms:.0f} ms")
+            return img
+
         img = Image.new("1", (self.config.EPD_WIDTH, self.config.EPD_HEIGHT), 255)
         draw = ImageDraw.Draw(img)
 
@@ -311,31 +537,75 @@ class ImageRenderer:
         cal_height = right_h - self.config.TIME_BLOCK_H - 22
         self._draw_month_calendar(draw, right_x + 2, right_y + 2, right_w - 6, cal_height, current_time)
 
+        self._save_static_cache(cache_path, img)
+
         elapsed_ms = (time.perf_counter() - start_time) * 1000
         logger.info(f"Render estática concluída em {elapsed_ms:.0f} ms")
 
         return img
 
-    def render_dynamic(self, base_image: Image.Image, google_service, page_index: int = 0) -> Image.Image:
-        """Render dynamic elements (time, events)"""
+    def _events_key(self, show_items: list, page_index: int, total_pages: int,
+                    current_time: datetime) -> tuple:
+        """What the events panel depends on; the panel is redrawn only when this changes"""
+        # Dia sem eventos com a imagem AI falhando: a chave muda a cada AI_RETRY_INTERVAL,
+        # então o painel é redesenhado e a imagem tentada de novo (como antes do render incremental)
+        ai_retry = None
+        if not show_items and self._ai_failed:
+            ai_retry = int(current_time.timestamp() // self.AI_RETRY_INTERVAL)
+        return tuple(show_items), page_index, total_pages, ai_retry
+
+    def page_count(self, items: list) -> int:
+        """Number of event pages for a list of items (1 when empty: the 'no events' page)"""
+        per_page = self.config.EVENTS_PER_PAGE
+        return max((len(items) + per_page - 1) // per_page, 1)
+
+    def render_dynamic(self, base_image: Image.Image, google_service, page_index: int = 0,
+                       current_time: Optional[datetime] = None) -> Image.Image:
+        """
+        Render dynamic elements (time, events)
+
+        current_time defaults to now; pass a future time to prerender the next
+        frame. Frames alternate between two buffers, so the returned image stays
+        untouched until the render after next.
+        """
         start_time = time.perf_counter()
 
-        current_time = datetime.now(self.config.get_timezone())
+        if current_time is None:
+            current_time = datetime.now(self.config.get_timezone())
         items = google_service.get_events_and_tasks()
 
         # Calculate pagination
-        if items:
-            total_pages = (len(items) + self.config.EVENTS_PER_PAGE - 1) // self.config.EVENTS_PER_PAGE
-            page_index = page_index % total_pages
-            start_idx = page_index * self.config.EVENTS_PER_PAGE
-            end_idx = start_idx + self.config.EVENTS_PER_PAGE
-            show_items = items[start_idx:end_idx]
-        else:
-            show_items, total_pages = [], 1
+        total_pages = self.page_count(items)
+        page_index = page_index % total_pages
+        start_idx = page_index * self.config.EVENTS_PER_PAGE
+        show_items = items[start_idx:start_idx + self.config.EVENTS_PER_PAGE]
 
-        # Copy base image and get draw context
-        img = base_image.copy()
-        draw = ImageDraw.Draw(img)
+        time_text = current_time.strftime("%H:%M")
+        events_key = self._events_key(show_items, page_index, total_pages, current_time)
+
+        # Nada mudou desde o último quadro: devolve o mesmo buffer sem redesenhar
+        # (o display descarta o quadro repetido pelo hash, sem tocar no SPI)
+        last = self._frames[self._frame_index ^ 1]
+        if (last.base is base_image and last.time_text == time_text
+                and last.events_key == events_key):
+            logger.debug("Render dinâmica sem mudanças, reutilizando quadro anterior")
+            return last.img
+
+        # Reaproveita o buffer enquanto a base estática for a mesma
+        # (buffers e ImageDraw alocados uma vez)
+        frame = self._frames[self._frame_index]
+        self._frame_index ^= 1
+        if frame.img is None or frame.img.size != base_image.size:
+            frame.img = Image.new("1", base_image.size, 255)
+            frame.draw = ImageDraw.Draw(frame.img)
+            frame.base = None
+        if frame.base is not base_image:
+            frame.img.paste(base_image, (0, 0))
+            frame.base = base_image
+            frame.time_text = None
+            frame.events_key = None
+        img = frame.img
+        draw = frame.draw
 
         # Calculate panel dimensions
         right_x, right_y = self.config.LEFT_PANEL_W + 2, self.config.MARGIN
@@ -346,17 +616,22 @@ class ImageRenderer:
         left_w = self.config.LEFT_PANEL_W - self.config.MARGIN * 2
         left_h = self.config.EPD_HEIGHT - self.config.MARGIN * 2
 
-        # Draw time block
-        cal_height = right_h - self.config.TIME_BLOCK_H - 8
-        self._draw_time_block(draw, right_x + 2, right_y + cal_height + 6, right_w - 7, current_time)
-
-        # Clear and draw events area
-        draw.rectangle([left_x + 1, left_y + 1, left_x + left_w - 1, left_y + left_h - 1], fill=255)
-        self._draw_events(draw, img, left_x + 2, left_y + 2, left_w - 4, left_h - 6,
-                         show_items, page_index=page_index, total_pages=total_pages)
-
-        elapsed_ms = (time.perf_counter() - start_time) * 1000
-        logger.info(f"Render dinâmica p={page_index + 1}/{total_pages} "
-                   f"itens_mostrados={len(show_items)} em {elapsed_ms:.0f} ms")
+        # Draw time block (only when the minute changed; the block repaints its own background)
+        if time_text != frame.time_text:
+            cal_height = right_h - self.config.TIME_BLOCK_H - 8
+            self._draw_time_block(draw, img, right_x + 2, right_y + cal_height + 6, right_w - 7, current_time)
+            frame.time_text = time_text
+
+        # Clear and draw events area (only when the visible page changed)
+        if events_key != frame.events_key:
+            # Todo o interior da moldura (barra de título e rodapé incluídos), não só o miolo
+            img.paste(255, (left_x, left_y, left_x + left_w + 1, left_y + left_h + 1))
+            self._draw_events(draw, img, left_x + 2, left_y + 2, left_w - 4, left_h - 6,
+                             show_items, page_index=page_index, total_pages=total_pages)
+            # Recalculada: o desenho pode ter acabado de falhar (ou conseguir) a imagem AI
+            frame.events_key = self._events_key(show_items, page_index, total_pages, current_time)
+
+        logger.debug("Render dinâmica p=%d/%d itens_mostrados=%d em %.0f ms", page_index + 1, total_pages,
+                     len(show_items), (time.perf_counter() - start_time) * 1000)
 
         return img
\ No newline at end of file
@@ -9,6 +9,9 @@ import time as _time
 from logging.handlers import TimedRotatingFileHandler
 from pathlib import Path
 
+# Buffer de leitura/compressão na rotação dos logs
+_COPY_BUFFER = 1024 * 1024
+
 def setup_logging(config=None) -> logging.Logger:
     """Setup logging with rotation and compression"""
 
@@ -42,10 +45,20 @@ def setup_logging(config=None) -> logging.Logger:
                 import gzip
                 import shutil
 
-                # Compress the rotated log
-                with open(source, "rb") as f_in:
-                    with gzip.open(dest + ".gz", "wb") as f_out:
-                        shutil.copyfileobj(f_in, f_out)
+                # Compress the rotated log (nível 1: no Pi Zero o nível 9 custa muita CPU para
+                # pouco ganho; blocos de 1 MiB e .gz só aparece completo, via rename atômico)
+                tmp_dest = dest + ".gz.tmp"
+                try:
+                    with open(source, "rb", buffering=_COPY_BUFFER) as f_in:
+                        with gzip.open(tmp_dest, "wb", compresslevel=1) as f_out:
+                            shutil.copyfileobj(f_in, f_out, _COPY_BUFFER)
+                    os.replace(tmp_dest, dest + ".gz")
+                except Exception:
+                    try:
+                        os.remove(tmp_dest)
+                    except Exception:
+                        pass
+                    raise
 
                 # Remove uncompressed file
                 try:
@@ -8,45 +8,94 @@ Versão corrigida - previne vazamento de file descriptors
 """
 
 import argparse
+import hashlib
+import json
+import os
 import signal
 import sys
+import threading
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, time as dt_time
 from config import Config
 from display_controller import DisplayController
-from google_service import GoogleService
+from google_service import GoogleService, GoogleFetcher
 from image_renderer import ImageRenderer
 from logger_setup import setup_logging
 
-# Variáveis globais para cleanup
-display = None
+# Logger global (usado pelas funções auxiliares)
 logger = None
 
+# Pedido de encerramento: acorda o loop na hora, sem cortar uma atualização do painel no meio
+stop_event = threading.Event()
+
+SHUTDOWN_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+def exit_signal_handler(signum, frame):
+    """Handle shutdown signals outside the main loop (startup, OAuth login)"""
+    # Na inicialização e no login OAuth ninguém olha o stop_event: SystemExit desfaz a pilha
+    # até o finally de main(), que faz o cleanup uma única vez
+    sys.exit(0)
+
 def signal_handler(signum, frame):
     """Handle shutdown signals gracefully"""
-    global display, logger
-    
-    if logger:
-        logger.info(f"Sinal recebido: {signum}. Encerrando gracefully...")
-    
-    if display:
-        try:
-            display.cleanup()
-        except Exception as e:
-            if logger:
-                logger.warning(f"Erro no cleanup do display: {e}")
-    
-    sys.exit(0)
+    # Só marca o pedido (seguro mesmo reentrante); log e cleanup ficam na thread principal
+    stop_event.set()
+
+def install_signal_handlers(handler):
+    """Route every shutdown signal to the same handler"""
+    for signum in SHUTDOWN_SIGNALS:
+        signal.signal(signum, handler)
+
+def seconds_until_next_tick(interval: int) -> float:
+    """Seconds until the next multiple of `interval` on the wall clock (+ small margin)"""
+    # Acorda logo após a virada do minuto, para o relógio nunca ficar defasado
+    return interval - (time.time() % interval) + 0.2
+
+def day_end_timestamp(day, tz) -> float:
+    """Epoch timestamp of the local midnight that ends `day`"""
+    return datetime.combine(day + timedelta(days=1), dt_time.min, tzinfo=tz).timestamp()
+
+def image_hash(image) -> str:
+    """Short content hash of a frame, stable across restarts"""
+    return hashlib.blake2b(image.tobytes(), digest_size=8).hexdigest()
+
+def load_state(path, max_age: int):
+    """Display state saved by a previous run, or None if missing, invalid or older than max_age seconds"""
+    if max_age <= 0:
+        return None
+    try:
+        if time.time() - os.path.getmtime(path) > max_age:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        return {"static_hash": str(state["static_hash"]), "page_index": int(state["page_index"])}
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Estado salvo inválido, ignorando: {e}")
+        return None
+
+def save_state(path, state: dict) -> bool:
+    """Atomically write the display state (True on success)"""
+    try:
+        tmp_path = str(path) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, str(path))
+        return True
+    except Exception as e:
+        logger.warning(f"Falha ao salvar estado do display: {e}")
+        return False
 
 def main():
-    global display, logger
+    global logger
     
     # Setup logging
     logger = setup_logging()
 
     # Register signal handlers
-    signal.signal(signal.SIGTERM, signal_handler)
-    signal.signal(signal.SIGINT, signal_handler)
+    install_signal_handlers(exit_signal_handler)
 
     # Parse arguments
     parser = argparse.ArgumentParser()
@@ -54,62 +103,152 @@ def main():
                        help="Gera PNG em vez do display")
     args = parser.parse_args()
 
+    display = None
+    prerender_pool = None
+    fetcher = None
+
     try:
         # Initialize components
         config = Config()
-        google_service = GoogleService(config)
+        config.activate()
         renderer = ImageRenderer(config)
 
+        # O display vem antes da busca: no primeiro login a tela de autenticação usa o mesmo controlador
+        if not args.dry_run:
+            display = DisplayController(config)
+
+        google_service = GoogleService(config, display=display, font_manager=renderer.font_manager)
+
+        # Busca no Google em segundo plano; o loop só lê os últimos itens
+        fetcher = GoogleFetcher(google_service, config.FETCH_INTERVAL, config.FETCH_BACKOFF_MAX)
+        fetcher.start()
+
         logger.info("Sistema iniciado com sucesso")
 
-        # Initial render
-        today = datetime.now(config.get_timezone()).date()
+        # Initial render (a virada do dia vira uma comparação de timestamps no loop)
+        tz = config.get_timezone()
+        day_end = day_end_timestamp(datetime.now(tz).date(), tz)
         base_img = renderer.render_static()
-        img = renderer.render_dynamic(base_img, google_service)
+        img = renderer.render_dynamic(base_img, fetcher)
 
         if args.dry_run:
             img.save(args.dry_run)
             logger.info(f"PNG salvo em {args.dry_run}")
             return 0
 
-        # Display initial image
-        display = DisplayController(config)
-        
-        display.show_image(base_img, full_update=True)
+        # Reinício recente com a mesma parte estática: pula o Clear e o quadro só com a base e
+        # retoma a página onde parou. O primeiro quadro ainda passa por um refresh completo
+        # (displayPartBaseImage grava a base das parciais no controlador recém-iniciado)
+        static_hash = image_hash(base_img)
+        state = load_state(config.STATE_FILE, config.STATE_MAX_AGE)
+        page_index = 0
+        if state is not None and state["static_hash"] == static_hash:
+            page_index = state["page_index"] % renderer.page_count(fetcher.get_events_and_tasks())
+            logger.info("Estado recente encontrado, retomando sem limpar a tela")
+        else:
+            # Display initial image
+            display.show_image(base_img, full_update=True)
 
         # Main loop
-        page_index = 0
+        saved_state, saved_at = state, time.time()
         error_count = 0
         max_errors = 5
-        
-        while True:
+        # Depois da tela de autenticação o próximo quadro precisa de refresh completo
+        force_full = False
+
+        # O próximo quadro é desenhado em segundo plano enquanto o atual vai para o painel
+        prerender_pool = ThreadPoolExecutor(max_workers=1)
+        next_frame = None  # (base, itens, página, minuto desde a epoch, Future)
+
+        # A partir daqui o sinal só marca o pedido; o loop sai entre duas atualizações
+        install_signal_handlers(signal_handler)
+
+        while not stop_event.is_set():
             try:
-                now = datetime.now(config.get_timezone())
+                # Token revogado/expirado: a busca em segundo plano só sinaliza; a tela de
+                # autenticação e o OAuth rodam aqui, a única thread que escreve no painel
+                if fetcher.auth_required:
+                    logger.warning("Login no Google necessário, iniciando autenticação")
+                    install_signal_handlers(exit_signal_handler)
+                    try:
+                        google_service.login()
+                    finally:
+                        install_signal_handlers(signal_handler)
+                    fetcher.fetch()
+                    force_full = True
+
+                now_ts = time.time()
 
                 # Check for day change
-                if now.date() != today:
+                day_changed = now_ts >= day_end
+                if day_changed:
                     logger.info("Mudança de dia detectada, regenerando parte estática")
                     base_img = renderer.render_static()
-                    display.show_image(base_img, full_update=True)
-                    today = now.date()
+                    static_hash = image_hash(base_img)
+                    day_end = day_end_timestamp(datetime.now(tz).date(), tz)
                     page_index = 0
+                    # Eventos do dia novo já no primeiro quadro (a busca em segundo plano
+                    # pode estar a até FETCH_INTERVAL de distância)
+                    try:
+                        fetcher.fetch()
+                    except Exception as e:
+                        logger.warning(f"Falha ao buscar eventos do novo dia: {e}")
 
-                # Update dynamic content
-                img = renderer.render_dynamic(base_img, google_service, page_index)
-                display.show_image(img, full_update=False)
+                # Cada busca publica uma lista nova: a identidade dela marca a versão dos itens
+                items = fetcher.get_events_and_tasks()
 
-                logger.info(f"Atualização parcial OK (página {page_index + 1})")
-                page_index += 1
+                # Update dynamic content (usa o quadro pré-renderizado se ainda for o certo)
+                img = None
+                if next_frame is not None:
+                    frame_base, frame_items, frame_page, frame_minute, future = next_frame
+                    next_frame = None
+                    rendered = future.result()
+                    if (frame_base is base_img and frame_items is items and frame_page == page_index
+                            and frame_minute == int(now_ts // 60)):
+                        img = rendered
+                    elif frame_items is not items:
+                        # Itens novos podem ter menos páginas que o índice preparado
+                        page_index %= renderer.page_count(items)
+                if img is None:
+                    img = renderer.render_dynamic(base_img, fetcher, page_index)
+
+                # Próxima página já normalizada (o índice não cresce sem limite e o quadro
+                # pré-renderizado continua casando na volta para a primeira página)
+                next_page = (page_index + 1) % renderer.page_count(items)
+                next_tick_ts = time.time() + seconds_until_next_tick(config.UPDATE_INTERVAL)
+                next_frame = (base_img, items, next_page, int(next_tick_ts // 60),
+                              prerender_pool.submit(renderer.render_dynamic, base_img, fetcher, next_page,
+                                                    datetime.fromtimestamp(next_tick_ts, tz)))
+
+                # Na virada do dia normalmente só a marcação do calendário muda: parcial basta;
+                # mudanças grandes (ex.: mês novo) fazem refresh completo para não deixar ghosting
+                full_update = force_full
+                if day_changed and not full_update:
+                    full_update = display.changed_ratio(img) * 100 >= config.DAY_CHANGE_FULL_PERCENT
+
+                display.show_image(img, full_update=full_update)
+                force_full = False
+
+                # Atualizações parciais rotineiras só em DEBUG (uma linha por minuto no cartão SD)
+                if full_update:
+                    logger.info("Atualização completa OK (página %d)", page_index + 1)
+                else:
+                    logger.debug("Atualização parcial OK (página %d)", page_index + 1)
+
+                # Estado só é regravado quando muda ou está perto de expirar (poupa o cartão SD)
+                state = {"static_hash": static_hash, "page_index": page_index}
+                if config.STATE_MAX_AGE > 0 and (state != saved_state
+                                                 or now_ts - saved_at >= config.STATE_MAX_AGE / 2):
+                    if save_state(config.STATE_FILE, state):
+                        saved_state, saved_at = state, now_ts
+                page_index = next_page
                 
                 # Reset error counter on success
                 error_count = 0
 
-                time.sleep(config.UPDATE_INTERVAL)
+                if stop_event.wait(seconds_until_next_tick(config.UPDATE_INTERVAL)):
+                    break
 
-            except KeyboardInterrupt:
-                logger.info("Encerrado pelo usuário (Ctrl+C)")
-                break
-                
             except Exception as e:
                 error_count += 1
                 logger.exception(f"Erro no loop de atualização ({error_count}/{max_errors}): {e}")
@@ -120,13 +259,20 @@ def main():
                     try:
                         display.cleanup()
                         display = DisplayController(config)
+                        google_service.display = display
                         logger.info("Display reinicializado com sucesso")
                         error_count = 0
                     except Exception as reinit_error:
                         logger.error(f"Falha ao reinicializar display: {reinit_error}")
                         break
                 
-                time.sleep(config.UPDATE_INTERVAL)
+                # Falhas de rede ficam no GoogleFetcher; aqui sobram render/display, que podem
+                # se recuperar no próximo minuto (esperar mais congelaria o relógio na tela)
+                if stop_event.wait(seconds_until_next_tick(config.UPDATE_INTERVAL)):
+                    break
+
+        if stop_event.is_set():
+            logger.info("Sinal de encerramento recebido. Encerrando gracefully...")
 
     except Exception as e:
         logger.exception(f"Erro crético na inicialização: {e}")
@@ -134,6 +280,12 @@ def main():
     
     finally:
         # Cleanup ao sair
+        if fetcher:
+            fetcher.stop()
+
+        if prerender_pool:
+            prerender_pool.shutdown(wait=False)
+
         if display:
             try:
                 display.cleanup()
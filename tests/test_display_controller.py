@@ -0,0 +1,112 @@
+"""DisplayController against a fake Waveshare driver (no SPI/GPIO needed)"""
+
+import os
+import sys
+import types
+
+import pytest
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import display_controller
+
+
+class FakeEPD:
+    """Minimal epd2in13_V2.EPD: records calls, getbuffer ported from the Waveshare driver"""
+
+    width = 122
+    height = 250
+    FULL_UPDATE = 0
+    PART_UPDATE = 1
+
+    def __init__(self, calls, fail_on=()):
+        self.calls = calls
+        self.fail_on = fail_on
+
+    def _record(self, name):
+        self.calls.append(name)
+        if name in self.fail_on:
+            raise OSError(f"{name} falhou")
+
+    def init(self, mode):
+        self._record("init")
+
+    def Clear(self, color):
+        self._record("Clear")
+
+    def displayPartBaseImage(self, image):
+        self._record("displayPartBaseImage")
+
+    def displayPartial(self, image):
+        self._record("displayPartial")
+
+    def sleep(self):
+        self._record("sleep")
+
+    def getbuffer(self, image):
+        linewidth = (self.width + 7) // 8
+        buf = [0xFF] * (linewidth * self.height)
+        image_monocolor = image.convert('1')
+        imwidth, imheight = image_monocolor.size
+        pixels = image_monocolor.load()
+        if imwidth == self.width and imheight == self.height:
+            for y in range(imheight):
+                for x in range(imwidth):
+                    if pixels[x, y] == 0:
+                        buf[x // 8 + y * linewidth] &= ~(0x80 >> (x % 8))
+        elif imwidth == self.height and imheight == self.width:
+            for y in range(imheight):
+                for x in range(imwidth):
+                    newx = y
+                    newy = self.height - x - 1
+                    if pixels[x, y] == 0:
+                        buf[newx // 8 + newy * linewidth] &= ~(0x80 >> (y % 8))
+        return buf
+
+
+def make_controller(monkeypatch, fail_on=(), rotate=True):
+    calls = []
+    epdconfig = types.SimpleNamespace(module_exit=lambda: calls.append("module_exit"))
+    module = types.SimpleNamespace(EPD=lambda: FakeEPD(calls, fail_on), epdconfig=epdconfig)
+    monkeypatch.setattr(display_controller, "epd2in13_V2", module)
+    config = types.SimpleNamespace(ROTATE_DISPLAY=rotate, EINK_WINDOWED_PARTIAL=False, SPI_SPEED_HZ=0,
+                                   EINK_PARTIAL_ERASURE_LIMIT=0, FULL_REFRESH_EVERY=0)
+    return display_controller.DisplayController(config), calls
+
+
+def sample_frame(size=(250, 122)):
+    img = Image.new('1', size, 255)
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([3, 4, 40, 20], fill=0)
+    draw.line([0, 0, size[0] - 1, size[1] - 1], fill=0)
+    draw.text((60, 50), "12:34", fill=0)
+    return img
+
+
+def test_cleanup_releases_driver_after_failed_update(monkeypatch):
+    display, calls = make_controller(monkeypatch, fail_on=("displayPartBaseImage",))
+    with pytest.raises(OSError):
+        display.show_image(sample_frame(), full_update=True)
+
+    display.cleanup()
+    assert "sleep" in calls
+    assert calls[-1] == "module_exit"
+
+
+def test_cleanup_releases_driver_when_sleep_fails(monkeypatch):
+    display, calls = make_controller(monkeypatch, fail_on=("sleep",))
+    display.cleanup()
+    assert calls[-2:] == ["sleep", "module_exit"]
+
+
+@pytest.mark.parametrize("rotate", [False, True])
+@pytest.mark.parametrize("size", [(250, 122), (122, 250)])
+def test_fast_getbuffer_matches_driver(monkeypatch, rotate, size):
+    display, _ = make_controller(monkeypatch, rotate=rotate)
+    assert display._fast_buffer
+
+    frame = sample_frame(size)
+    reference = frame.transpose(Image.ROTATE_180) if rotate else frame
+    expected = bytes(bytearray(display._epd.getbuffer(reference)))
+    assert bytes(display._get_buffer(frame)) == expected
@@ -0,0 +1,317 @@
+"""Pure helpers of google_service (no network: API clients are faked)"""
+
+import os
+import sys
+import types
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from googleapiclient.errors import HttpError
+
+from google_service import GoogleFetcher, GoogleService, _local_hhmm, _parse_rfc3339
+
+# Fuso fixo sem nome IANA: _fetch_events converte os horários com _local_hhmm
+BRT = timezone(timedelta(hours=-3))
+TODAY = datetime(2024, 5, 1, tzinfo=BRT)
+TOMORROW = TODAY + timedelta(days=1)
+
+
+class FakeFetchService:
+    """get_events_and_tasks() succeeds or fails following a fixed script"""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.auth_required = False
+        self.last_fetch_ok = False
+
+    def refresh_credentials_if_expiring(self):
+        pass
+
+    def get_events_and_tasks(self, interactive=True):
+        self.last_fetch_ok = self.results.pop(0)
+        return []
+
+
+def test_fetch_backoff_doubles_and_caps():
+    fetcher = GoogleFetcher(FakeFetchService([]), 300, 1800)
+    assert [fetcher._next_delay(n) for n in (0, 1, 2, 3, 50)] == [300, 600, 1200, 1800, 1800]
+    # Sem limite configurado (0) o intervalo nunca cresce
+    assert GoogleFetcher(FakeFetchService([]), 300)._next_delay(5) == 300
+
+
+def test_fetch_backoff_resets_after_success():
+    service = FakeFetchService([False, False, True, False])
+    fetcher = GoogleFetcher(service, 60, 3600)
+    delays = []
+
+    def fake_wait(timeout):
+        delays.append(timeout)
+        return not service.results
+
+    fetcher._stop = types.SimpleNamespace(wait=fake_wait)
+    fetcher._run()
+    assert delays == [60, 120, 240, 60, 120]
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("2024-05-01T13:30:00Z", "10:30"),
+    ("2024-05-01T13:30:00z", "10:30"),
+    ("2024-05-01T13:30:00.123Z", "10:30"),
+    ("2024-05-01T13:30:00.123456+00:00", "10:30"),
+    ("2024-05-01T10:30:00-03:00", "10:30"),
+    ("2024-05-01T15:30:00+02:00", "10:30"),
+    ("2024-05-01T20:15:00+09:45", "07:30"),
+    ("2024-05-02T01:00:00Z", "22:00"),
+    ("2024-04-30T22:00:00-05:00", "00:00"),
+])
+def test_local_hhmm_offset_math(raw, expected):
+    assert _local_hhmm(raw, BRT, -180) == expected
+    # Sem offset fixo no dia: caminho do parse completo dá o mesmo resultado
+    assert _local_hhmm(raw.replace("z", "Z"), BRT, None) == expected
+
+
+def test_local_hhmm_matches_datetime_conversion():
+    tz = timezone(timedelta(hours=5, minutes=30))
+    for hour in range(0, 24, 5):
+        for offset in ("Z", "+01:00", "-07:00", "+14:00", "-12:00"):
+            raw = f"2024-05-01T{hour:02d}:07:00{offset}"
+            expected = _parse_rfc3339(raw).astimezone(tz).strftime("%H:%M")
+            assert _local_hhmm(raw, tz, 330) == expected
+
+
+class Request:
+    """googleapiclient request stand-in: execute() calls a function with the kwargs"""
+
+    def __init__(self, fn, **kwargs):
+        self.fn = fn
+        self.kwargs = kwargs
+        self.headers = {}
+
+    def execute(self):
+        return self.fn(**self.kwargs)
+
+
+class Batch:
+    def __init__(self, callback):
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request, request_id))
+
+    def execute(self):
+        for request, request_id in self.requests:
+            try:
+                response = request.execute()
+            except Exception as e:
+                self.callback(request_id, None, e)
+            else:
+                self.callback(request_id, response, None)
+
+
+class FakeCalendarAPI:
+    """One calendar ('cal'); full listings return `events`, syncToken calls return `delta`"""
+
+    def __init__(self, events):
+        self.events_by_id = {event["id"]: event for event in events}
+        self.delta = []
+        self.calls = []
+
+    def calendarList(self):
+        return types.SimpleNamespace(list=lambda **kw: Request(lambda: {"items": [{"id": "cal"}], "etag": "e1"}))
+
+    def events(self):
+        return types.SimpleNamespace(list=lambda **kw: Request(self._list, **kw))
+
+    def new_batch_http_request(self, callback):
+        return Batch(callback)
+
+    def _list(self, **kwargs):
+        self.calls.append(kwargs)
+        if "syncToken" in kwargs:
+            delta, self.delta = self.delta, []
+            return {"items": delta, "nextSyncToken": "t2"}
+        return {"items": list(self.events_by_id.values()), "nextSyncToken": "t1"}
+
+
+def http_error(status):
+    return HttpError(types.SimpleNamespace(status=status, reason=""), b"")
+
+
+def make_service():
+    config = types.SimpleNamespace(CALENDAR_LIST_CACHE_TTL=3600)
+    return GoogleService(config)
+
+
+def timed(event_id, start, end, summary="Evento"):
+    return {"id": event_id, "summary": summary, "start": {"dateTime": start}, "end": {"dateTime": end}}
+
+
+def test_fetch_events_local_times_and_all_day():
+    api = FakeCalendarAPI([
+        timed("1", "2024-05-01T13:30:00Z", "2024-05-01T14:00:00Z", "Reunião"),
+        timed("2", "2024-05-01T09:00:00.500-03:00", "2024-05-01T10:00:00-03:00", "Café"),
+        {"id": "3", "summary": "Feriado", "start": {"date": "2024-05-01"}, "end": {"date": "2024-05-02"}},
+    ])
+    events = make_service()._fetch_events(api, BRT, TODAY, TOMORROW, -180)
+    assert sorted(events) == [
+        ("09:00", "Café", "Calendar", ""),
+        ("10:30", "Reunião", "Calendar", ""),
+        ("Dia todo", "Feriado", "Calendar", ""),
+    ]
+
+
+@pytest.mark.parametrize("event, expected", [
+    (timed("a", "2024-05-01T10:00:00-03:00", "2024-05-01T11:00:00-03:00"), True),
+    (timed("b", "2024-04-30T23:00:00-03:00", "2024-05-01T01:00:00-03:00"), True),
+    (timed("c", "2024-04-30T22:00:00-03:00", "2024-05-01T00:00:00-03:00"), False),
+    (timed("d", "2024-05-02T00:00:00-03:00", "2024-05-02T01:00:00-03:00"), False),
+    (timed("e", "2024-05-02T02:30:00Z", "2024-05-02T03:30:00Z"), True),
+    (timed("f", "2024-05-02T03:00:00Z", "2024-05-02T04:00:00Z"), False),
+    ({"start": {"date": "2024-05-01"}, "end": {"date": "2024-05-02"}}, True),
+    ({"start": {"date": "2024-04-29"}, "end": {"date": "2024-05-03"}}, True),
+    ({"start": {"date": "2024-04-30"}, "end": {"date": "2024-05-01"}}, False),
+    ({"start": {"date": "2024-05-02"}, "end": {"date": "2024-05-03"}}, False),
+    ({"start": {"dateTime": "não é data"}, "end": {}}, False),
+    ({}, False),
+])
+def test_overlaps_day(event, expected):
+    assert GoogleService._overlaps_day(event, TODAY, TOMORROW) is expected
+
+
+def test_sync_token_merges_changes():
+    api = FakeCalendarAPI([
+        timed("1", "2024-05-01T10:00:00-03:00", "2024-05-01T11:00:00-03:00", "Reunião"),
+        timed("2", "2024-05-01T12:00:00-03:00", "2024-05-01T13:00:00-03:00", "Almoço"),
+    ])
+    service = make_service()
+    assert len(service._fetch_events(api, BRT, TODAY, TOMORROW, -180)) == 2
+
+    api.delta = [
+        timed("1", "2024-05-01T15:00:00-03:00", "2024-05-01T16:00:00-03:00", "Reunião adiada"),
+        {"id": "2", "status": "cancelled"},
+        timed("3", "2024-05-01T17:00:00-03:00", "2024-05-01T18:00:00-03:00", "Academia"),
+        # Deltas trazem eventos de outros dias, que ficam de fora da lista
+        timed("4", "2024-05-03T09:00:00-03:00", "2024-05-03T10:00:00-03:00", "Outro dia"),
+    ]
+    events = service._fetch_events(api, BRT, TODAY, TOMORROW, -180)
+    assert sorted(events) == [
+        ("15:00", "Reunião adiada", "Calendar", ""),
+        ("17:00", "Academia", "Calendar", ""),
+    ]
+    assert sorted(service._sync_state["cal"]["events"]) == ["1", "3", "4"]
+    assert api.calls[-1]["syncToken"] == "t1"
+    assert "timeMin" not in api.calls[-1]
+
+    # Sem mudanças, o delta vazio mantém a cópia em memória
+    assert sorted(service._fetch_events(api, BRT, TODAY, TOMORROW, -180)) == sorted(events)
+    assert api.calls[-1]["syncToken"] == "t2"
+
+
+def test_sync_token_expired_triggers_full_resync():
+    api = FakeCalendarAPI([timed("1", "2024-05-01T10:00:00-03:00", "2024-05-01T11:00:00-03:00")])
+    service = make_service()
+    service._fetch_events(api, BRT, TODAY, TOMORROW, -180)
+
+    list_events = api._list
+
+    def expire_token(**kwargs):
+        if "syncToken" in kwargs:
+            api.calls.append(kwargs)
+            raise http_error(410)
+        return list_events(**kwargs)
+
+    api._list = expire_token
+    api.events_by_id["5"] = timed("5", "2024-05-01T20:00:00-03:00", "2024-05-01T21:00:00-03:00", "Jantar")
+    events = service._fetch_events(api, BRT, TODAY, TOMORROW, -180)
+
+    assert [sorted(call) for call in api.calls[-2:]] == [
+        ["calendarId", "fields", "singleEvents", "syncToken"],
+        ["calendarId", "fields", "singleEvents", "timeMax", "timeMin"],
+    ]
+    assert sorted(events) == [("10:00", "Evento", "Calendar", ""), ("20:00", "Jantar", "Calendar", "")]
+
+
+def test_sync_state_dropped_on_new_day():
+    api = FakeCalendarAPI([timed("1", "2024-05-01T10:00:00-03:00", "2024-05-01T11:00:00-03:00")])
+    service = make_service()
+    service._fetch_events(api, BRT, TODAY, TOMORROW, -180)
+    service._fetch_events(api, BRT, TOMORROW, TOMORROW + timedelta(days=1), -180)
+    assert "syncToken" not in api.calls[-1]
+    assert api.calls[-1]["timeMin"] == TOMORROW.isoformat()
+
+
+class ListRequest:
+    """calendarList().list() stand-in answering with a script of responses/errors"""
+
+    def __init__(self, outcome):
+        self.outcome = outcome
+        self.headers = {}
+        self.executed = False
+
+    def execute(self):
+        self.executed = True
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+
+def test_cached_list_reuses_items_within_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("google_service.time.monotonic", lambda: now[0])
+    service = make_service()
+
+    first = ListRequest({"items": [{"id": "cal"}], "etag": "e1"})
+    assert service._cached_list("calendars", first) == [{"id": "cal"}]
+    assert first.headers == {}
+
+    now[0] += 3599
+    cached = ListRequest({"items": []})
+    assert service._cached_list("calendars", cached) == [{"id": "cal"}]
+    assert not cached.executed
+
+
+def test_cached_list_revalidates_with_etag(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("google_service.time.monotonic", lambda: now[0])
+    service = make_service()
+    service._cached_list("calendars", ListRequest({"items": [{"id": "cal"}], "etag": "e1"}))
+
+    # 304: mantém os itens e renova o prazo
+    now[0] += 3600
+    not_modified = ListRequest(http_error(304))
+    assert service._cached_list("calendars", not_modified) == [{"id": "cal"}]
+    assert not_modified.headers["If-None-Match"] == "e1"
+    now[0] += 3599
+    assert service._cached_list("calendars", ListRequest(http_error(500))) == [{"id": "cal"}]
+
+    # Lista alterada: novos itens e nova ETag
+    now[0] += 1
+    changed = ListRequest({"items": [{"id": "cal"}, {"id": "work"}], "etag": "e2"})
+    assert service._cached_list("calendars", changed) == [{"id": "cal"}, {"id": "work"}]
+    assert changed.headers["If-None-Match"] == "e1"
+    assert service._list_cache["calendars"]["etag"] == "e2"
+
+
+def test_cached_list_errors_without_cache():
+    service = make_service()
+    with pytest.raises(HttpError):
+        service._cached_list("calendars", ListRequest(http_error(304)))
+    service._cached_list("calendars", ListRequest({"items": [{"id": "cal"}], "etag": "e1"}))
+    service._list_cache["calendars"]["ts"] -= 3600
+    with pytest.raises(HttpError):
+        service._cached_list("calendars", ListRequest(http_error(500)))
+
+
+def test_cached_list_without_etag_skips_revalidation_header():
+    service = make_service()
+    service._cached_list("tasklists", ListRequest({"items": [{"id": "l1"}]}))
+    service._list_cache["tasklists"]["ts"] -= 3600
+    request = ListRequest({"items": [{"id": "l2"}]})
+    assert service._cached_list("tasklists", request) == [{"id": "l2"}]
+    assert "If-None-Match" not in request.headers
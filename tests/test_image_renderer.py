@@ -0,0 +1,86 @@
+"""Incremental rendering must match a frame rendered from scratch"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["AI_IMAGES_ENABLED"] = "false"
+
+from config import Config
+from image_renderer import ImageRenderer
+
+ITEMS = [(f"{h:02d}:00", f"Evento {h}", "Calendar", "Sala" if h % 2 else "") for h in range(8, 17)]
+
+
+class FakeService:
+    """Stands in for GoogleService/GoogleFetcher: only hands out a fixed list"""
+
+    def __init__(self, items):
+        self.items = items
+
+    def get_events_and_tasks(self):
+        return self.items
+
+
+@pytest.fixture(scope="module")
+def config():
+    return Config()
+
+
+def test_reused_buffer_matches_fresh_render(config, tmp_path):
+    config.BASE_DIR = tmp_path
+    renderer = ImageRenderer(config)
+    base = renderer.render_static()
+    now = datetime(2024, 5, 1, 10, 30, tzinfo=config.get_timezone())
+
+    # Os quadros alternam entre dois buffers: cada passo redesenha sobre o conteúdo
+    # de dois quadros atrás (vazio -> lista, lista -> vazio, página -> página)
+    steps = [([], 0), (ITEMS, 0), (ITEMS, 1), ([], 0), (ITEMS, 2), ([], 0), ([], 0)]
+    for items, page in steps:
+        service = FakeService(items)
+        frame = renderer.render_dynamic(base, service, page, now)
+        fresh = ImageRenderer(config).render_dynamic(base, service, page, now)
+        assert frame.tobytes() == fresh.tobytes(), (len(items), page)
+
+
+class FakeAIService:
+    """get_daily_image fails on the first calls, then returns a black square"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def get_daily_image(self, size):
+        self.calls += 1
+        if self.calls <= self.failures:
+            return None
+        return Image.new("1", (20, 20), 0)
+
+
+def test_failed_ai_image_is_retried(config, tmp_path, monkeypatch):
+    config.BASE_DIR = tmp_path
+    monkeypatch.setattr(config, "AI_IMAGES_ENABLED", True)
+    renderer = ImageRenderer(config)
+    renderer._ai_service = FakeAIService(failures=2)
+    base = renderer.render_static()
+    service = FakeService([])
+    start = datetime(2024, 5, 1, 10, 0, tzinfo=config.get_timezone())
+
+    # Os dois buffers alternados desenham o painel vazio uma vez cada
+    free_day = renderer.render_dynamic(base, service, 0, start).tobytes()
+    renderer.render_dynamic(base, service, 0, start + timedelta(minutes=1))
+    assert renderer._ai_service.calls == 2
+
+    # Antes do intervalo de nova tentativa o painel não é redesenhado
+    for minute in (2, 3, 4):
+        renderer.render_dynamic(base, service, 0, start + timedelta(minutes=minute))
+    assert renderer._ai_service.calls == 2
+
+    retry_time = start + timedelta(seconds=ImageRenderer.AI_RETRY_INTERVAL)
+    with_image = renderer.render_dynamic(base, service, 0, retry_time).tobytes()
+    assert renderer._ai_service.calls == 3
+    assert with_image != free_day
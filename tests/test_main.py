@@ -0,0 +1,78 @@
+"""State file helpers of main (load_state / save_state)"""
+
+import json
+import logging
+import os
+import sys
+import time
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from main import load_state, save_state
+
+STATE = {"static_hash": "abc123", "page_index": 2}
+
+
+@pytest.fixture(autouse=True)
+def logger(monkeypatch):
+    # main.logger só é criado dentro de main()
+    monkeypatch.setattr(main, "logger", logging.getLogger("test_main"))
+
+
+def test_state_round_trip(tmp_path):
+    path = tmp_path / "state.json"
+    assert save_state(path, STATE)
+    assert load_state(path, 3600) == STATE
+    assert not os.path.exists(str(path) + ".tmp")
+
+
+def test_save_state_replaces_previous_state(tmp_path):
+    path = tmp_path / "state.json"
+    save_state(path, STATE)
+    save_state(path, {"static_hash": "def456", "page_index": 0})
+    assert load_state(path, 3600) == {"static_hash": "def456", "page_index": 0}
+
+
+def test_expired_state_is_ignored(tmp_path):
+    path = tmp_path / "state.json"
+    save_state(path, STATE)
+    old = time.time() - 7200
+    os.utime(str(path), (old, old))
+    assert load_state(path, 3600) is None
+    assert load_state(path, 10800) == STATE
+
+
+def test_state_disabled_with_zero_max_age(tmp_path):
+    path = tmp_path / "state.json"
+    save_state(path, STATE)
+    assert load_state(path, 0) is None
+
+
+def test_missing_state_file(tmp_path, caplog):
+    assert load_state(tmp_path / "state.json", 3600) is None
+    assert not caplog.records
+
+
+@pytest.mark.parametrize("content", [
+    "{not json",
+    "",
+    json.dumps({"static_hash": "abc123"}),
+    json.dumps({"static_hash": "abc123", "page_index": "dois"}),
+    json.dumps([1, 2]),
+])
+def test_corrupt_state_is_ignored(tmp_path, caplog, content):
+    path = tmp_path / "state.json"
+    path.write_text(content, encoding="utf-8")
+    assert load_state(path, 3600) is None
+    assert "Estado salvo inválido" in caplog.text
+
+
+def test_save_state_failure_returns_false(tmp_path, caplog):
+    path = tmp_path / "missing_dir" / "state.json"
+    assert not save_state(path, STATE)
+    assert "Falha ao salvar estado" in caplog.text